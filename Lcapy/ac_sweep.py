@@ -0,0 +1,175 @@
+import numpy as np
+import sympy as sp
+
+from Lcapy.mna_solver import MnaSystem, parse_value, MAX_CONDITION
+from Lcapy.analysis_cache import AnalysisCache, canonical_key
+from Lcapy.sweep import sweep_elements
+
+# Frequencies solved per batched np.linalg.solve call; bounds the memory of
+# the stacked (points, n, n) system.
+CHUNK_POINTS = 4096
+
+_ac_cache = AnalysisCache(max_entries=32)
+
+
+def frequency_points(f_start=1.0, f_stop=1e6, points=10000):
+    if f_start <= 0 or f_stop <= 0:
+        raise ValueError("Frequencies must be positive for a log sweep")
+    return np.geomspace(f_start, f_stop, points)
+
+
+def default_input(elements):
+    # The first voltage source drives the circuit, else the first current source.
+    for kind in ('V', 'I'):
+        for el in elements:
+            if el['type'] == kind:
+                return el['name']
+    raise ValueError("The netlist has no V or I source to use as the input")
+
+
+def ac_values(elements, input_name):
+    # Small-signal values: the input source becomes a unit phasor, the other
+    # sources are switched off, so node voltages are transfer functions.
+    values = []
+    for el in elements:
+        kind = el['type']
+        if kind in ('V', 'I'):
+            values.append(1.0 if el['name'] == input_name else 0.0)
+        elif kind == 'W':
+            values.append(0.0)
+        else:
+            value = parse_value(el['value'])
+            if value is None or value <= 0:
+                return None
+            values.append(value)
+    return values
+
+
+class NumericResponse:
+    # H(jw) = (G + jwC)^-1 b from the MNA stamps. When G is invertible and
+    # G^-1 C diagonalizes, H is kept in pole form, sum_k r_k / (1 + jw l_k),
+    # and a whole sweep is one (points x poles) @ (poles x unknowns) product.
+    # Otherwise each chunk of frequencies is one stacked np.linalg.solve.
+    def __init__(self, elements, values):
+        self.system = MnaSystem(elements)
+        self.G, self.C, self.b = self.system.stamp(values)
+        self.node_names = list(self.system.nodes)
+        self.poles = None
+        self.residues = None
+
+        try:
+            if np.linalg.cond(self.G) > MAX_CONDITION:
+                return
+            M = np.linalg.solve(self.G, self.C)
+            eigvals, V = np.linalg.eig(M)
+            if np.linalg.cond(V) > MAX_CONDITION:
+                return
+            d = np.linalg.solve(V, np.linalg.solve(self.G, self.b))
+        except np.linalg.LinAlgError:
+            return
+        self.poles = eigvals
+        self.residues = (V * d[None, :]).T
+
+    def solve_stacked(self, omega):
+        n = self.system.size
+        x = np.full((len(omega), n), np.nan, dtype=complex)
+        for start in range(0, len(omega), CHUNK_POINTS):
+            w = omega[start:start + CHUNK_POINTS]
+            A = self.G[None, :, :] + 1j * w[:, None, None] * self.C[None, :, :]
+            rhs = np.broadcast_to(self.b.astype(complex)[:, None], (len(w), n, 1))
+            try:
+                x[start:start + len(w)] = np.linalg.solve(A, rhs)[:, :, 0]
+            except np.linalg.LinAlgError:
+                # Singular at some frequencies: leave those NaN.
+                for i in range(len(w)):
+                    try:
+                        x[start + i] = np.linalg.solve(A[i], rhs[i])[:, 0]
+                    except np.linalg.LinAlgError:
+                        pass
+        return x
+
+    def __call__(self, omega):
+        if self.poles is not None:
+            x = (1.0 / (1.0 + 1j * omega[:, None] * self.poles[None, :])) @ self.residues
+        else:
+            x = self.solve_stacked(omega)
+        return {name: x[:, i] for i, name in enumerate(self.node_names)}
+
+
+class SymbolicResponse:
+    # Fallback for values only Lcapy understands: H(s) per node from
+    # Circuit.transfer, lambdified once and evaluated at s = jw.
+    def __init__(self, lines, input_name):
+        from lcapy import Circuit
+
+        cct = Circuit("\n".join(lines))
+        source = cct.elements[input_name]
+        if input_name[0] != 'V':
+            raise ValueError("Only voltage sources can drive a symbolic AC sweep")
+        a, b = (str(n) for n in source.nodes[:2])
+
+        self.node_names = sorted(str(n) for n in cct.nodes if str(n) != '0')
+        self._fns = {}
+        for n in self.node_names:
+            if n == a and b == '0':
+                self._fns[n] = None
+                continue
+            H = cct.transfer(a, b, n, '0').sympy
+            s = [sym for sym in H.free_symbols if sym.name == 's']
+            unknown = sorted(sym.name for sym in H.free_symbols if sym.name != 's')
+            if unknown:
+                raise ValueError(f"Give numeric values for: {', '.join(unknown)}")
+            self._fns[n] = sp.lambdify(s, H, modules='numpy') if s else float(H)
+
+    def __call__(self, omega):
+        jw = 1j * omega
+        response = {}
+        for n, fn in self._fns.items():
+            if fn is None:
+                response[n] = np.ones_like(jw)
+            elif callable(fn):
+                response[n] = np.broadcast_to(np.asarray(fn(jw), dtype=complex), jw.shape)
+            else:
+                response[n] = np.full(jw.shape, fn, dtype=complex)
+        return response
+
+
+def build_response(lines, input_name=None):
+    elements = sweep_elements(lines)
+    input_name = input_name or default_input(elements)
+    if input_name not in {el['name'] for el in elements if el['type'] in ('V', 'I')}:
+        raise ValueError(f"{input_name} is not a source of this netlist")
+    if '0' not in {n for el in elements for n in el['nodes']}:
+        raise ValueError("No Ground Node (0) found.")
+
+    values = ac_values(elements, input_name)
+    if values is not None:
+        return input_name, NumericResponse(elements, values)
+    return input_name, SymbolicResponse(lines, input_name)
+
+
+def ac_sweep(netlist_str, frequencies=None, input_name=None, nodes=None, cache=_ac_cache):
+    # Returns the complex response of each node voltage to a unit input
+    # source, with magnitude (dB) and unwrapped phase (degrees).
+    lines = [line for line in netlist_str.split('\n') if line.strip() and not line.startswith('#')]
+    frequencies = frequency_points() if frequencies is None else np.asarray(frequencies, dtype=float)
+
+    key = (canonical_key(lines), input_name)
+    built = cache.get_parametric(key) if cache is not None else None
+    if built is None:
+        built = build_response(lines, input_name)
+        if cache is not None:
+            cache.put_parametric(key, built)
+    input_name, response = built
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        H = response(2 * np.pi * frequencies)
+        if nodes is not None:
+            H = {n: H[n] for n in nodes if n in H}
+        return {
+            'input': input_name,
+            'frequencies': frequencies,
+            'response': H,
+            'magnitude_db': {n: 20 * np.log10(np.abs(h)) for n, h in H.items()},
+            'phase_deg': {n: np.degrees(np.unwrap(np.angle(h))) for n, h in H.items()},
+        }
@@ -0,0 +1,90 @@
+import threading
+from collections import OrderedDict
+
+from Lcapy.mna_solver import parse_value
+
+
+def canonical_line(line):
+    return " ".join(line.split())
+
+
+def canonical_key(lines):
+    # Row order, spacing and comment lines do not change the circuit.
+    kept = [canonical_line(line) for line in lines if line.strip() and not line.strip().startswith('#')]
+    return "\n".join(sorted(kept))
+
+
+def is_parameter(el):
+    # Positive numeric values can be swapped for Lcapy's (positive) symbols.
+    if el['type'] not in ('R', 'C', 'L', 'V', 'I'):
+        return False
+    value = parse_value(el['value'])
+    return value is not None and value > 0
+
+
+def topology_key(elements):
+    # Names, types and nodes, plus any value that cannot be substituted later.
+    parts = []
+    for el in elements:
+        fixed_value = None if is_parameter(el) else el['value']
+        parts.append((el['name'], el['type'], el['nodes'], fixed_value))
+    return tuple(sorted(parts))
+
+
+class AnalysisCache:
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.results = OrderedDict()
+        self.systems = OrderedDict()
+        self.parametric = OrderedDict()
+        self.symbolic_solves = OrderedDict()
+
+    def _get(self, table, key):
+        with self.lock:
+            value = table.get(key)
+            if value is not None:
+                table.move_to_end(key)
+            return value
+
+    def _put(self, table, key, value):
+        with self.lock:
+            table[key] = value
+            table.move_to_end(key)
+            while len(table) > self.max_entries:
+                table.popitem(last=False)
+
+    def get_result(self, key):
+        return self._get(self.results, key)
+
+    def put_result(self, key, result):
+        self._put(self.results, key, result)
+
+    def get_system(self, key):
+        return self._get(self.systems, key)
+
+    def put_system(self, key, system):
+        self._put(self.systems, key, system)
+
+    def get_parametric(self, key):
+        return self._get(self.parametric, key)
+
+    def put_parametric(self, key, solution):
+        self._put(self.parametric, key, solution)
+
+    def count_symbolic_solve(self, key):
+        # How many full symbolic solves this topology has needed so far.
+        with self.lock:
+            count = self.symbolic_solves.get(key, 0) + 1
+            self.symbolic_solves[key] = count
+            self.symbolic_solves.move_to_end(key)
+            while len(self.symbolic_solves) > self.max_entries:
+                self.symbolic_solves.popitem(last=False)
+            return count
+
+    def clear(self):
+        with self.lock:
+            self.results.clear()
+            self.systems.clear()
+            self.parametric.clear()
+            self.symbolic_solves.clear()
@@ -0,0 +1,372 @@
+import itertools
+import threading
+import time
+import multiprocessing as mp
+from collections import deque
+from multiprocessing.connection import wait
+
+from Lcapy.results import Quantity, AnalysisResult
+
+QUEUED, RUNNING = 'queued', 'running'
+DONE, FAILED, TIMEOUT, CANCELLED = 'done', 'failed', 'timeout', 'cancelled'
+
+DEFAULT_TIMEOUT_S = 30.0
+# Netlists one worker solves before it is replaced; SymPy's caches only grow.
+MAX_JOBS_PER_WORKER = 200
+POLL_S = 0.05
+
+
+def netlist_lines(netlist_str):
+    return [line for line in netlist_str.split('\n') if line.strip() and not line.startswith('#')]
+
+
+def netlist_nodes(lines):
+    # The node names solve_symbolic reports, in the same order.
+    nodes = {part for line in lines for part in line.split()[1:3]}
+    nodes.discard('0')
+    return sorted(nodes)
+
+
+def _send(conn, message):
+    try:
+        conn.send(message)
+    except Exception as e:
+        # Results that do not pickle are reported instead of killing the worker.
+        kind, job_id, _ = message
+        if kind == 'partial':
+            return
+        conn.send((FAILED, job_id, f"Could not return the result: {e}"))
+
+
+def _worker_main(conn):
+    # Runs in a spawned process: Lcapy is imported once, then netlists are
+    # solved until the parent sends None or closes the pipe.
+    try:
+        from Lcapy.circuit_analysis import analyze
+    except Exception as e:
+        conn.send(('broken', None, f"Could not load Lcapy: {e}"))
+        return
+    conn.send(('ready', None, None))
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        job_id, netlist_str = message
+        try:
+            result = analyze(netlist_str, progress=lambda q: _send(conn, ('partial', job_id, q)))
+        except Exception as e:
+            _send(conn, (FAILED, job_id, str(e)))
+        else:
+            _send(conn, (DONE, job_id, result))
+
+
+class AnalysisJob:
+    def __init__(self, job_id, netlist_str, timeout_s, on_partial=None, on_done=None, deadline=None):
+        self.id = job_id
+        self.netlist_str = netlist_str
+        self.lines = netlist_lines(netlist_str)
+        self.timeout_s = timeout_s
+        # Absolute time.perf_counter() limit that also covers time spent queued.
+        self.deadline = deadline
+        self.on_partial = on_partial
+        self.on_done = on_done
+        self.status = QUEUED
+        self.partial = []
+        self.result = None
+        self.error = None
+        self.started_at = None
+        self.elapsed_s = None
+        self.cancel_requested = False
+        self._done = threading.Event()
+
+    def done(self):
+        return self._done.is_set()
+
+    def expiry(self, now):
+        # The reason this job has run out of time, or None.
+        if self.deadline is not None and now > self.deadline:
+            return "Analysis stopped at the caller's deadline"
+        if self.started_at is not None and now - self.started_at > self.timeout_s:
+            return f"Analysis timed out after {self.timeout_s:g}s"
+        return None
+
+    def wait(self, timeout=None):
+        self._done.wait(timeout)
+        return self.done()
+
+    @property
+    def finished_nodes(self):
+        quantities = self.result.nodes if self.status == DONE else self.partial
+        return [q.name for q in quantities if q.kind == 'voltage']
+
+    @property
+    def pending_nodes(self):
+        finished = set(self.finished_nodes)
+        if self.status == DONE:
+            return []
+        return [n for n in netlist_nodes(self.lines) if n not in finished]
+
+    def partial_result(self, reason):
+        # Nodes solved before the worker was stopped keep their values; the
+        # rest are listed with the reason so the report shows what is missing.
+        nodes = [q for q in self.partial if q.kind == 'voltage']
+        branches = [q for q in self.partial if q.kind == 'current']
+        finished = len(nodes)
+        nodes += [Quantity(n, 'voltage', error=reason) for n in self.pending_nodes]
+        warning = f"Warning: {reason}; {finished} of {len(nodes)} node voltages finished."
+        return AnalysisResult(self.lines, [warning], sorted(nodes, key=lambda q: q.name), branches)
+
+    def to_log(self):
+        if self.result is None:
+            return f"Analysis Failed:\n{self.error}\n\nCheck your netlist connections."
+        return self.result.to_log()
+
+    def to_dict(self):
+        payload = {
+            'status': self.status,
+            'elapsed_s': None if self.elapsed_s is None else round(self.elapsed_s, 4),
+            'error': self.error,
+            'finished_nodes': self.finished_nodes,
+            'pending_nodes': self.pending_nodes,
+        }
+        if self.result is not None:
+            payload.update(self.result.to_dict())
+        return payload
+
+
+class _Worker:
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), name='lcapy-worker', daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.job = None
+        self.jobs_done = 0
+
+    def stop(self, kill=False):
+        if not kill:
+            try:
+                self.conn.send(None)
+            except OSError:
+                kill = True
+            self.process.join(1.0)
+        if kill or self.process.is_alive():
+            self.process.kill()
+            self.process.join(1.0)
+        self.conn.close()
+
+
+class AnalysisPool:
+    # Runs analyze() in spawned worker processes so a netlist that sends
+    # Lcapy/SymPy into a minutes-long solve cannot stall the caller. Each job
+    # has a wall-clock budget; SymPy cannot be interrupted, so a worker that
+    # overruns (or whose job is cancelled) is killed and replaced, and the job
+    # ends with the node voltages that were finished before that.
+    def __init__(self, workers=1, timeout_s=DEFAULT_TIMEOUT_S, max_jobs_per_worker=MAX_JOBS_PER_WORKER):
+        self.size = max(1, workers)
+        self.timeout_s = timeout_s
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.ctx = mp.get_context('spawn')
+        self.lock = threading.Lock()
+        self.pending = deque()
+        self.workers = []
+        self.recycled = 0
+        self.start_error = None
+        self._ids = itertools.count(1)
+        self._ready = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        with self.lock:
+            if self._thread is None:
+                self.workers = [_Worker(self.ctx) for _ in range(self.size)]
+                self._thread = threading.Thread(target=self._supervise, name='analysis-pool', daemon=True)
+                self._thread.start()
+        return self
+
+    def wait_ready(self, timeout=None):
+        # Returns the start-up error, if the workers could not load Lcapy.
+        self.start()
+        self._ready.wait(timeout)
+        return self.start_error
+
+    def close(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self.lock:
+            jobs = list(self.pending) + [w.job for w in self.workers if w.job is not None]
+            self.pending.clear()
+        for job in jobs:
+            self._finish(job, CANCELLED)
+        for worker in self.workers:
+            worker.stop(kill=worker.job is not None)
+        self.workers = []
+
+    def submit(self, netlist_str, timeout_s=None, on_partial=None, on_done=None, deadline=None):
+        # on_partial(quantity) and on_done(job) usually run on the pool's
+        # supervisor thread, so they must not block.
+        self.start()
+        job = AnalysisJob(next(self._ids), netlist_str, timeout_s or self.timeout_s,
+                          on_partial=on_partial, on_done=on_done, deadline=deadline)
+        with self.lock:
+            self.pending.append(job)
+        return job
+
+    def cancel(self, job):
+        with self.lock:
+            if job in self.pending:
+                self.pending.remove(job)
+                self._finish(job, CANCELLED)
+            else:
+                job.cancel_requested = True
+
+    def analyze(self, netlist_str, timeout_s=None):
+        job = self.submit(netlist_str, timeout_s=timeout_s)
+        job.wait()
+        return job
+
+    def analyze_netlist(self, netlist_str, timeout_s=None):
+        return self.analyze(netlist_str, timeout_s=timeout_s).to_log()
+
+    def _supervise(self):
+        while not self._stopping.is_set():
+            self._dispatch()
+            conns = {w.conn: w for w in self.workers if w.job is not None or not w.ready}
+            if conns:
+                for conn in wait(list(conns), timeout=POLL_S):
+                    self._receive(conns[conn])
+            else:
+                time.sleep(POLL_S)
+            self._expire()
+
+    def _dispatch(self):
+        with self.lock:
+            if self.start_error is not None:
+                while self.pending:
+                    self._finish(self.pending.popleft(), FAILED, error=self.start_error)
+                return
+            for worker in self.workers:
+                if not self.pending:
+                    break
+                if not worker.ready or worker.job is not None:
+                    continue
+                job = self.pending.popleft()
+                job.status = RUNNING
+                job.started_at = time.perf_counter()
+                worker.job = job
+                try:
+                    worker.conn.send((job.id, job.netlist_str))
+                except OSError:
+                    worker.job = None
+                    job.status = QUEUED
+                    self.pending.appendleft(job)
+                    self._recycle(worker)
+
+    def _receive(self, worker):
+        job = worker.job
+        try:
+            kind, job_id, payload = worker.conn.recv()
+        except Exception:
+            # The process died (crash, out of memory) or sent something unreadable.
+            if not worker.ready:
+                # Dying while loading Lcapy will happen to a replacement too.
+                self._broken(worker, "The analysis worker exited while loading Lcapy")
+                return
+            self._recycle(worker)
+            if job is not None:
+                self._finish(job, FAILED, error="The analysis worker exited unexpectedly")
+            return
+
+        if kind == 'ready':
+            worker.ready = True
+            self._ready.set()
+        elif kind == 'broken':
+            self._broken(worker, payload)
+        elif job is None or job_id != job.id:
+            return
+        elif kind == 'partial':
+            job.partial.append(payload)
+            if job.on_partial is not None:
+                try:
+                    job.on_partial(payload)
+                except Exception:
+                    pass
+        else:
+            worker.job = None
+            worker.jobs_done += 1
+            if kind == DONE:
+                self._finish(job, DONE, result=payload)
+            else:
+                self._finish(job, FAILED, error=payload)
+            if worker.jobs_done >= self.max_jobs_per_worker:
+                self._recycle(worker, kill=False)
+
+    def _expire(self):
+        now = time.perf_counter()
+        with self.lock:
+            expired = [job for job in self.pending if job.expiry(now) is not None]
+            for job in expired:
+                self.pending.remove(job)
+        for job in expired:
+            self._finish(job, TIMEOUT, error=job.expiry(now))
+
+        for worker in list(self.workers):
+            job = worker.job
+            if job is None:
+                continue
+            if job.cancel_requested:
+                status, reason = CANCELLED, "Analysis cancelled"
+            elif job.expiry(now) is not None:
+                status, reason = TIMEOUT, job.expiry(now)
+            else:
+                continue
+            self._recycle(worker)
+            self._finish(job, status, error=reason)
+
+    def _recycle(self, worker, kill=True):
+        worker.stop(kill=kill)
+        if self.start_error is not None:
+            self.workers.remove(worker)
+            return
+        self.workers[self.workers.index(worker)] = _Worker(self.ctx)
+        self.recycled += 1
+
+    def _broken(self, worker, error):
+        # Workers that cannot load Lcapy are not replaced: every job fails
+        # with the start-up error instead of spawning processes forever.
+        self.start_error = self.start_error or error
+        worker.stop(kill=True)
+        self.workers.remove(worker)
+        self._ready.set()
+
+    def _finish(self, job, status, result=None, error=None):
+        if job.done():
+            return
+        if job.started_at is not None:
+            job.elapsed_s = time.perf_counter() - job.started_at
+        job.status = status
+        job.error = error
+        if status == DONE:
+            job.result = result
+        elif status in (TIMEOUT, CANCELLED):
+            job.result = job.partial_result(error or "Analysis cancelled")
+        job._done.set()
+        if job.on_done is not None:
+            try:
+                job.on_done(job)
+            except Exception:
+                pass
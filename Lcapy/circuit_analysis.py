@@ -1,71 +1,210 @@
 from lcapy import Circuit
-import io
 import sympy as sp
 
-def analyze_netlist(netlist_str):
-    log_output = []
-    
-    def log(msg):
-        log_output.append(msg)
+from Lcapy.mna_solver import MnaSystem, parse_elements, parse_values
+from Lcapy.analysis_cache import AnalysisCache, canonical_key, topology_key, is_parameter
+from Lcapy.parametric import ParametricSolution, exact_value
+from Lcapy.expr_cleanup import ExprCleaner, to_sympy, select_branch
+from Lcapy.results import Quantity, AnalysisResult
+from profiling.stage_timer import span
 
-    def clean_expr(expr):
-        try:
-            expr_sym = sp.sympify(str(expr))
-            if isinstance(expr_sym, sp.Piecewise):
-                for e, cond in expr_sym.args:
-                    if cond is True or (hasattr(cond, 'lhs') and cond.lhs == sp.Symbol('t')):
-                        return sp.simplify(e)
-            return sp.simplify(expr_sym)
-        except:
-            return expr
+_default_cache = AnalysisCache()
+_expr_cleaner = ExprCleaner()
+
+
+def clean_expr(expr):
+    return _expr_cleaner.clean(expr)
+
+
+def solve_numeric(elements, values, cache):
+    topo = topology_key(elements)
+    system = cache.get_system(topo) if cache is not None else None
+    if system is None:
+        system = MnaSystem(elements)
+        if cache is not None:
+            cache.put_system(topo, system)
 
+    if not system.has_ground:
+        return None
+    # A reused system may have been built from the rows in another order.
+    by_name = {el['name']: v for el, v in zip(elements, values)}
+    solved = system.solve_dc([by_name[el['name']] for el in system.elements])
+    if solved is None:
+        return None
+
+    node_voltages, branch_currents = solved
+    return {
+        'warnings': [],
+        'nodes': [Quantity(n, 'voltage', v) for n, v in node_voltages],
+        'branches': [Quantity(key, 'current', i) for key, i in branch_currents if key[0] not in ['W', 'P', 'O']],
+    }
+
+
+def resistor_current(cct, key, voltages):
+    # Ohm's law on the already solved node voltages instead of another
+    # inverse Laplace transform. None when Lcapy has to be asked. voltages
+    # are the exact expressions: cleaned ones may have float coefficients
+    # that leave round-off constants behind when subtracted.
+    el = cct.elements[key]
     try:
-        lines = [line for line in netlist_str.split('\n') if line.strip() and not line.startswith('#')]
-        clean_netlist = "\n".join(lines)
-        
-        log(f"--- Processing Netlist ({len(lines)} components) ---")
-        log(clean_netlist)
-        log("------------------------------------------------")
+        a, b = (str(n) for n in el.nodes[:2])
+        resistance = el.R.sympy
+    except Exception:
+        return None
+    if a not in voltages or b not in voltages or resistance == 0:
+        return None
+    if any(sym.name == 's' for sym in resistance.free_symbols):
+        return None
+    current = clean_expr((voltages[a] - voltages[b]) / resistance)
+    # A difference the exact steps could not reduce ends up with float
+    # coefficients and round-off terms; Lcapy's own answer is exact.
+    if isinstance(current, sp.Basic) and current.has(sp.Float):
+        return None
+    return current
+
 
+def solve_symbolic(clean_netlist, timer=None, progress=None):
+    # progress(quantity) is called as each node voltage and branch current is solved.
+    with span(timer, 'lcapy_build'):
         cct = Circuit(clean_netlist)
-        
-        log(">> Time-Domain Analysis (t ≥ 0):")
-        
-        if '0' not in cct.nodes:
-            log("Warning: No Ground Node (0) found.")
-
-        node_list = sorted([str(n) for n in cct.nodes if str(n) != '0'])
-        
+
+    warnings = []
+    if '0' not in cct.nodes:
+        warnings.append("Warning: No Ground Node (0) found.")
+
+    node_list = sorted([str(n) for n in cct.nodes if str(n) != '0'])
+
+    nodes = []
+    voltages = {'0': sp.Integer(0)}
+    with span(timer, 'node_voltages'):
         for n in node_list:
             try:
-                val_time = cct[n].V.time()
-                val_show = clean_expr(val_time)
-                
-                try:
-                    val_float = float(val_show)
-                    log(f"  V({n}, t) \t= {val_float:.4f} V")
-                except:
-                    log(f"  V({n}, t) \t= {val_show} V")
+                voltage = cct[n].V.time()
+                nodes.append(Quantity(n, 'voltage', clean_expr(voltage)))
+                voltages[n] = select_branch(to_sympy(voltage))
             except Exception as e:
-                log(f"  V({n}, t) \t= Error ({e})")
+                nodes.append(Quantity(n, 'voltage', error=e))
+            if progress is not None:
+                progress(nodes[-1])
 
-        log("\n>> Branch Currents (t ≥ 0):")
+    branches = []
+    with span(timer, 'branch_currents'):
         for key in cct.elements:
             try:
-                if key[0] in ['W', 'P', 'O']: continue 
-                
-                curr_time = cct[key].I.time()
-                curr_show = clean_expr(curr_time)
-
-                try:
-                    curr_float = float(curr_show)
-                    log(f"  I({key}, t) \t= {curr_float:.6f} A")
-                except:
-                    log(f"  I({key}, t) \t= {curr_show} A")
+                if key[0] in ['W', 'P', 'O']: continue
+
+                current = resistor_current(cct, key, voltages) if key[0] == 'R' else None
+                if current is None:
+                    current = clean_expr(cct[key].I.time())
+                branches.append(Quantity(key, 'current', current))
             except:
-                pass
+                continue
+            if progress is not None:
+                progress(branches[-1])
+
+    return {'warnings': warnings, 'nodes': nodes, 'branches': branches}
+
+
+def substituted_invalid(expr):
+    # Symbolic forms that only become complex after substitution (e.g.
+    # under-damped RLC), or that divide by zero at degenerate values (e.g.
+    # critical damping), are left to a direct solve.
+    return isinstance(expr, sp.Basic) and expr.has(sp.I, sp.nan, sp.zoo, sp.oo, -sp.oo)
+
+
+def solve_from_parametric(solution, elements):
+    values = {el['name']: exact_value(el['value']) for el in elements if el['name'] in solution.params}
+    node_exprs, branch_exprs = solution.evaluate(values)
 
-        return "\n".join(log_output)
+    nodes = []
+    for n, expr, err in node_exprs:
+        if err is not None:
+            return None
+        val_show = clean_expr(expr)
+        if substituted_invalid(val_show):
+            return None
+        nodes.append(Quantity(n, 'voltage', val_show))
 
+    branches = []
+    for key, expr in branch_exprs:
+        curr_show = clean_expr(expr)
+        if substituted_invalid(curr_show):
+            return None
+        branches.append(Quantity(key, 'current', curr_show))
+
+    warnings = [] if solution.has_ground else ["Warning: No Ground Node (0) found."]
+    return {'warnings': warnings, 'nodes': nodes, 'branches': branches}
+
+
+def solve_incremental(elements, cache):
+    # Reuse a parametric solution once a topology is being iterated on.
+    topo = topology_key(elements)
+    solution = cache.get_parametric(topo)
+    if solution is None:
+        if cache.count_symbolic_solve(topo) < 2:
+            return None
+        params = [el['name'] for el in elements if is_parameter(el)]
+        if not params:
+            return None
+        try:
+            solution = ParametricSolution(elements, params)
+        except Exception:
+            return None
+        cache.put_parametric(topo, solution)
+
+    return solve_from_parametric(solution, elements)
+
+
+def solve_lines(lines, cache=None, timer=None, progress=None):
+    key = canonical_key(lines)
+    if cache is not None:
+        cached = cache.get_result(key)
+        if cached is not None:
+            return cached
+
+    result = None
+    with span(timer, 'parse'):
+        elements = parse_elements(lines)
+        values = parse_values(elements) if elements else None
+    if elements:
+        if values is not None:
+            # Purely numeric DC netlists are solved directly; Lcapy handles the rest.
+            with span(timer, 'numeric'):
+                result = solve_numeric(elements, values, cache)
+        if result is None and cache is not None:
+            with span(timer, 'parametric'):
+                result = solve_incremental(elements, cache)
+
+    if result is None:
+        with span(timer, 'symbolic'):
+            result = solve_symbolic("\n".join(lines), timer=timer, progress=progress)
+
+    if cache is not None:
+        cache.put_result(key, result)
+    return result
+
+
+def ordered_branches(branches, lines):
+    # Cached results may come from a netlist with rows in another order.
+    order = {}
+    for line in lines:
+        parts = line.split()
+        if parts and parts[0] not in order:
+            order[parts[0]] = len(order)
+    return sorted(branches, key=lambda b: order.get(b.name, len(order)))
+
+
+def analyze(netlist_str, cache=_default_cache, timer=None, progress=None):
+    # Solves the netlist and returns an AnalysisResult; errors propagate.
+    # progress only hears about quantities solved through Lcapy, the slow path.
+    lines = [line for line in netlist_str.split('\n') if line.strip() and not line.startswith('#')]
+    with span(timer, 'analyze_netlist'):
+        result = solve_lines(lines, cache=cache, timer=timer, progress=progress)
+    return AnalysisResult(lines, result['warnings'], result['nodes'], ordered_branches(result['branches'], lines))
+
+
+def analyze_netlist(netlist_str, cache=_default_cache, timer=None):
+    try:
+        return analyze(netlist_str, cache=cache, timer=timer).to_log()
     except Exception as e:
-        return f"Analysis Failed:\n{str(e)}\n\nCheck your netlist connections."
\ No newline at end of file
+        return f"Analysis Failed:\n{str(e)}\n\nCheck your netlist connections."
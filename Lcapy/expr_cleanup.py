@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import OrderedDict
+
+import sympy as sp
+
+# sp.simplify is only tried on expressions this small; its run time is
+# unbounded and cannot be interrupted once started.
+SIMPLIFY_MAX_OPS = 12
+# Time-only results still this large after the exact steps are shown with
+# floating-point coefficients instead of nested radicals.
+NUMERIC_MIN_OPS = 40
+NUMERIC_DIGITS = 8
+
+
+def to_sympy(expr):
+    # Lcapy expressions wrap a SymPy one; only unknown objects go through a string.
+    if isinstance(expr, sp.Basic):
+        return expr
+    inner = getattr(expr, 'sympy', None)
+    if isinstance(inner, sp.Basic):
+        return inner
+    return sp.sympify(str(expr))
+
+
+def is_time(symbol):
+    # Lcapy's t is a real symbol, so it is matched by name.
+    return getattr(symbol, 'name', None) == 't'
+
+
+def select_branch(expr):
+    # Lcapy returns Piecewise results split at t = 0; keep the t >= 0 branch.
+    if isinstance(expr, sp.Piecewise):
+        for e, cond in expr.args:
+            if cond == True or is_time(getattr(cond, 'lhs', None)):
+                return e
+    return expr
+
+
+def cleanup_steps(expr):
+    # Cheapest first; each step gets the best form found so far.
+    if expr.has(sp.I):
+        # Conjugate pole pairs: exp((a + bI)t) terms become exp(at)cos(bt).
+        yield 'expand_complex', sp.expand_complex, True
+    yield 'factor_terms', sp.factor_terms, False
+    if any(not is_time(s) for s in expr.free_symbols):
+        # Rational functions of component symbols; never helps exp(t) terms.
+        yield 'cancel', sp.cancel, False
+    yield 'simplify', sp.simplify, False
+
+
+class ExprCleaner:
+    # Turns Lcapy results into readable SymPy expressions without a full
+    # sp.simplify on each one. Steps run cheapest first until the per-expression
+    # budget is spent; finished results are cached per unique expression.
+    def __init__(self, budget_s=0.5, max_entries=512):
+        self.budget_s = budget_s
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.results = OrderedDict()
+
+    def clean(self, expr):
+        try:
+            expr = to_sympy(expr)
+        except Exception:
+            return expr
+
+        with self.lock:
+            cached = self.results.get(expr)
+            if cached is not None:
+                self.results.move_to_end(expr)
+                return cached
+
+        result, finished = self.run_steps(select_branch(expr))
+        # Results cut short by the budget may improve next time.
+        if finished:
+            with self.lock:
+                self.results[expr] = result
+                while len(self.results) > self.max_entries:
+                    self.results.popitem(last=False)
+        return result
+
+    def run_steps(self, expr):
+        deadline = time.perf_counter() + self.budget_s
+        best = expr
+        best_ops = sp.count_ops(best)
+        for name, step, removes_i in cleanup_steps(expr):
+            if time.perf_counter() > deadline:
+                return best, False
+            if name == 'simplify' and best_ops > SIMPLIFY_MAX_OPS:
+                continue
+            try:
+                candidate = step(best)
+            except Exception:
+                continue
+            ops = sp.count_ops(candidate)
+            # Getting rid of I is worth a longer expression.
+            if ops < best_ops or (removes_i and best.has(sp.I) and not candidate.has(sp.I)):
+                best, best_ops = candidate, ops
+
+        if best_ops >= NUMERIC_MIN_OPS and all(is_time(s) for s in best.free_symbols):
+            best = best.evalf(NUMERIC_DIGITS)
+        return best, True
+
+    def clear(self):
+        with self.lock:
+            self.results.clear()
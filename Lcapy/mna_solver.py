@@ -0,0 +1,153 @@
+import re
+import numpy as np
+
+SI_PREFIXES = {
+    'f': 1e-15, 'p': 1e-12, 'n': 1e-9, 'u': 1e-6, 'm': 1e-3,
+    'k': 1e3, 'K': 1e3, 'M': 1e6, 'G': 1e9, 'T': 1e12,
+}
+# Same plain-number forms Lcapy accepts (1k, 1.5K, 2e-3, .5, 10u, ...).
+NUMBER_RE = re.compile(r'^([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)([fpnumkKMGT]?)$')
+
+TWO_TERMINAL_TYPES = ('R', 'C', 'L', 'V', 'I')
+BRANCH_TYPES = ('V', 'L', 'W')
+MAX_CONDITION = 1e12
+
+
+def parse_value(text):
+    match = NUMBER_RE.match(text)
+    if not match:
+        return None
+    return float(match.group(1)) * SI_PREFIXES.get(match.group(2), 1.0)
+
+
+def parse_elements(lines):
+    # Returns [{'name', 'type', 'nodes', 'value'}] or None when the netlist
+    # uses anything the numeric engine does not model.
+    elements = []
+    seen = set()
+    for line in lines:
+        parts = line.split()
+        if not parts:
+            continue
+        name = parts[0]
+        kind = name[0]
+        if name in seen:
+            return None
+        seen.add(name)
+
+        if kind == 'W' and len(parts) == 3:
+            elements.append({'name': name, 'type': 'W', 'nodes': (parts[1], parts[2]), 'value': None})
+        elif kind in TWO_TERMINAL_TYPES and len(parts) == 4:
+            elements.append({'name': name, 'type': kind, 'nodes': (parts[1], parts[2]), 'value': parts[3]})
+        else:
+            return None
+    return elements
+
+
+def parse_values(elements):
+    values = []
+    for el in elements:
+        if el['type'] == 'W':
+            values.append(0.0)
+            continue
+        value = parse_value(el['value'])
+        if value is None or (el['type'] == 'R' and value == 0):
+            return None
+        values.append(value)
+    return values
+
+
+def clean_float(x):
+    # Drop round-off noise and negative zero so the log matches Lcapy's exact results.
+    return round(float(x), 12) + 0.0
+
+
+class MnaSystem:
+    # Modified nodal analysis in the form G x + C dx/dt = b, with one unknown
+    # per non-ground node followed by one branch current per V, L and W.
+    def __init__(self, elements):
+        self.elements = elements
+
+        nodes = set()
+        for el in elements:
+            nodes.update(el['nodes'])
+        self.has_ground = '0' in nodes
+        self.nodes = sorted(n for n in nodes if n != '0')
+        self.node_index = {n: i for i, n in enumerate(self.nodes)}
+
+        self.branch_index = {}
+        for el in elements:
+            if el['type'] in BRANCH_TYPES:
+                self.branch_index[el['name']] = len(self.nodes) + len(self.branch_index)
+        self.size = len(self.nodes) + len(self.branch_index)
+
+    def stamp(self, values):
+        G = np.zeros((self.size, self.size))
+        C = np.zeros((self.size, self.size))
+        b = np.zeros(self.size)
+
+        for el, value in zip(self.elements, values):
+            a = self.node_index.get(el['nodes'][0])
+            k = self.node_index.get(el['nodes'][1])
+            kind = el['type']
+
+            if kind in ('R', 'C'):
+                target = G if kind == 'R' else C
+                y = 1.0 / value if kind == 'R' else value
+                if a is not None: target[a, a] += y
+                if k is not None: target[k, k] += y
+                if a is not None and k is not None:
+                    target[a, k] -= y
+                    target[k, a] -= y
+            elif kind == 'I':
+                # Lcapy convention: the source drives its current out of the + node.
+                if a is not None: b[a] += value
+                if k is not None: b[k] -= value
+            else:
+                j = self.branch_index[el['name']]
+                if a is not None:
+                    G[a, j] += 1
+                    G[j, a] += 1
+                if k is not None:
+                    G[k, j] -= 1
+                    G[j, k] -= 1
+                if kind == 'V':
+                    b[j] = value
+                elif kind == 'L':
+                    C[j, j] -= value
+
+        return G, C, b
+
+    def element_currents(self, x, values):
+        # Current through each element from its + node to its - node.
+        voltages = {n: x[i] for n, i in self.node_index.items()}
+        voltages['0'] = 0.0
+
+        currents = []
+        for el, value in zip(self.elements, values):
+            kind = el['type']
+            va = voltages[el['nodes'][0]]
+            vb = voltages[el['nodes'][1]]
+            if kind == 'R':
+                current = (va - vb) / value
+            elif kind == 'C':
+                current = 0.0
+            elif kind == 'I':
+                current = -value
+            else:
+                current = x[self.branch_index[el['name']]]
+            currents.append((el['name'], current))
+        return currents
+
+    def solve_dc(self, values):
+        # DC steady state: capacitors open, inductors shorted. Returns None when
+        # the resistive system is singular (floating nodes, source loops, ...).
+        G, _, b = self.stamp(values)
+        if self.size == 0 or np.linalg.cond(G) > MAX_CONDITION:
+            return None
+        x = np.linalg.solve(G, b)
+
+        node_voltages = [(n, clean_float(x[i])) for n, i in self.node_index.items()]
+        branch_currents = [(name, clean_float(i)) for name, i in self.element_currents(x, values)]
+        return node_voltages, branch_currents
+
@@ -0,0 +1,60 @@
+from lcapy import Circuit
+import sympy as sp
+
+from Lcapy.mna_solver import parse_value
+
+
+def exact_value(text):
+    # Lcapy keeps netlist numbers exact (1k -> 1000, 1u -> 1/1000000).
+    return sp.Rational(repr(parse_value(text)))
+
+
+class ParametricSolution:
+    # One symbolic Lcapy solve with the chosen element values replaced by
+    # symbols; new values are substituted instead of solving again.
+    def __init__(self, elements, params):
+        self.params = list(params)
+        lines = []
+        for el in elements:
+            a, b = el['nodes']
+            if el['type'] == 'W':
+                lines.append(f"{el['name']} {a} {b}")
+            elif el['name'] in self.params:
+                lines.append(f"{el['name']} {a} {b} {el['name']}")
+            else:
+                lines.append(f"{el['name']} {a} {b} {el['value']}")
+
+        cct = Circuit("\n".join(lines))
+        self.has_ground = '0' in cct.nodes
+
+        self.node_exprs = []
+        for n in sorted([str(n) for n in cct.nodes if str(n) != '0']):
+            try:
+                self.node_exprs.append((n, cct[n].V.time().sympy, None))
+            except Exception as e:
+                self.node_exprs.append((n, None, e))
+
+        self.branch_exprs = []
+        for key in cct.elements:
+            if key[0] in ['W', 'P', 'O']: continue
+            try:
+                self.branch_exprs.append((key, cct[key].I.time().sympy))
+            except:
+                pass
+
+        self.symbols = {}
+        for _, expr, _ in self.node_exprs:
+            if expr is not None:
+                self.symbols.update({s.name: s for s in expr.free_symbols})
+        for _, expr in self.branch_exprs:
+            self.symbols.update({s.name: s for s in expr.free_symbols})
+
+    def substitutions(self, values):
+        # values: {element name: exact sympy number}
+        return {self.symbols[name]: v for name, v in values.items() if name in self.symbols}
+
+    def evaluate(self, values):
+        subs = self.substitutions(values)
+        nodes = [(n, expr.subs(subs) if expr is not None else None, err) for n, expr, err in self.node_exprs]
+        branches = [(key, expr.subs(subs)) for key, expr in self.branch_exprs]
+        return nodes, branches
@@ -0,0 +1,89 @@
+import json
+
+UNITS = {'voltage': "V", 'current': "A"}
+PRECISION = {'voltage': 4, 'current': 6}
+LABELS = {'voltage': "V", 'current': "I"}
+
+
+def to_float(expr):
+    try:
+        return float(expr)
+    except Exception:
+        return None
+
+
+class Quantity:
+    # One node voltage or branch current: the exact (possibly symbolic)
+    # expression, its float value when it has one, or the error that
+    # prevented solving it.
+    def __init__(self, name, kind, expr=None, error=None):
+        self.name = name
+        self.kind = kind
+        self.expr = expr
+        self.error = error
+        self.value = to_float(expr) if error is None else None
+        self.unit = UNITS[kind]
+
+    @property
+    def label(self):
+        return f"{LABELS[self.kind]}({self.name}, t)"
+
+    def value_text(self):
+        if self.error is not None:
+            return f"Error ({self.error})"
+        if self.value is not None:
+            return f"{self.value:.{PRECISION[self.kind]}f}"
+        return str(self.expr)
+
+    def text(self):
+        if self.error is not None:
+            return self.value_text()
+        return f"{self.value_text()} {self.unit}"
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'kind': self.kind,
+            'unit': self.unit,
+            'value': self.value,
+            'expr': None if self.expr is None else str(self.expr),
+            'error': None if self.error is None else str(self.error),
+        }
+
+
+class AnalysisResult:
+    def __init__(self, lines, warnings, nodes, branches):
+        self.lines = list(lines)
+        self.warnings = list(warnings)
+        self.nodes = list(nodes)
+        self.branches = list(branches)
+
+    def node(self, name):
+        return next((q for q in self.nodes if q.name == name), None)
+
+    def branch(self, name):
+        return next((q for q in self.branches if q.name == name), None)
+
+    def to_dict(self):
+        return {
+            'netlist': self.lines,
+            'warnings': self.warnings,
+            'nodes': [q.to_dict() for q in self.nodes],
+            'branches': [q.to_dict() for q in self.branches],
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_log(self):
+        log_output = [
+            f"--- Processing Netlist ({len(self.lines)} components) ---",
+            "\n".join(self.lines),
+            "------------------------------------------------",
+            ">> Time-Domain Analysis (t ≥ 0):",
+        ]
+        log_output.extend(self.warnings)
+        log_output.extend(f"  {q.label} \t= {q.text()}" for q in self.nodes)
+        log_output.append("\n>> Branch Currents (t ≥ 0):")
+        log_output.extend(f"  {q.label} \t= {q.text()}" for q in self.branches)
+        return "\n".join(log_output)
@@ -0,0 +1,143 @@
+import numpy as np
+import sympy as sp
+
+from Lcapy.mna_solver import TWO_TERMINAL_TYPES, parse_value
+from Lcapy.analysis_cache import AnalysisCache, canonical_key
+from Lcapy.parametric import ParametricSolution
+
+_sweep_cache = AnalysisCache(max_entries=32)
+# Relative step either side of a removable singularity (e.g. an RLC at
+# critical damping), where the compiled formula itself gives 0/0.
+SINGULAR_STEP = 1e-6
+
+
+def sweep_points(start, stop, points=1000, scale='log'):
+    if scale == 'log':
+        if start <= 0 or stop <= 0:
+            raise ValueError("A log sweep needs positive start and stop values")
+        return np.geomspace(start, stop, points)
+    if scale == 'linear':
+        return np.linspace(start, stop, points)
+    raise ValueError(f"Unknown sweep scale: {scale} (expected 'log' or 'linear')")
+
+
+def sweep_elements(lines):
+    # Like parse_elements, but the values of elements that are not swept may
+    # be anything Lcapy accepts (e.g. 'step 5').
+    elements = []
+    for line in lines:
+        parts = line.split()
+        if parts[0][0] == 'W' and len(parts) == 3:
+            elements.append({'name': parts[0], 'type': 'W', 'nodes': (parts[1], parts[2]), 'value': None})
+        elif parts[0][0] in TWO_TERMINAL_TYPES and len(parts) >= 4:
+            elements.append({'name': parts[0], 'type': parts[0][0], 'nodes': (parts[1], parts[2]),
+                             'value': " ".join(parts[3:])})
+        else:
+            raise ValueError(f"Sweeps support R, C, L, V, I and W rows only: {line}")
+    return elements
+
+
+def as_real(values):
+    # Expressions such as sqrt() of a discriminant go through complex
+    # arithmetic; keep them real when the imaginary part is only round-off.
+    values = np.asarray(values)
+    if np.iscomplexobj(values):
+        scale = max(1.0, float(np.abs(values.real).max(initial=0.0)))
+        if np.abs(values.imag).max(initial=0.0) <= 1e-9 * scale:
+            return values.real
+    return values
+
+
+class ParametricSweep:
+    # Solves the netlist once with the swept elements as symbols and compiles
+    # every node voltage and branch current into a NumPy function of them.
+    def __init__(self, lines, params):
+        self.lines = [line for line in lines if line.strip() and not line.strip().startswith('#')]
+        self.params = list(dict.fromkeys(params))
+        if not self.params:
+            raise ValueError("Choose at least one component to sweep")
+
+        elements = sweep_elements(self.lines)
+        by_name = {el['name']: el for el in elements}
+        for name in self.params:
+            if name not in by_name or by_name[name]['type'] == 'W':
+                raise ValueError(f"{name} is not a component of this netlist")
+        self.defaults = {name: parse_value(by_name[name]['value']) for name in self.params}
+        for name, value in self.defaults.items():
+            if value is None:
+                raise ValueError(f"{name} needs a numeric value to be swept")
+
+        solution = ParametricSolution(elements, self.params)
+        self.has_ground = solution.has_ground
+        t = sp.Symbol('t', real=True)
+        self.symbols = [solution.symbols.get(name, sp.Symbol(name)) for name in self.params]
+        allowed = set(self.symbols)
+
+        self.errors = {}
+        self.node_names = []
+        self.branch_names = []
+        exprs = []
+        for n, expr, err in solution.node_exprs:
+            if err is not None:
+                self.errors[n] = str(err)
+                continue
+            self.node_names.append(n)
+            exprs.append(sp.sympify(expr))
+        for key, expr in solution.branch_exprs:
+            self.branch_names.append(key)
+            exprs.append(sp.sympify(expr))
+
+        # Lcapy's t carries its own assumptions, so it is matched by name.
+        time_symbols = {s for e in exprs for s in e.free_symbols if s.name == 't'}
+        exprs = [e.subs({s: t for s in time_symbols}) for e in exprs]
+        self.uses_time = bool(time_symbols)
+        unknown = {s.name for e in exprs for s in e.free_symbols} - {s.name for s in allowed} - {'t'}
+        if unknown:
+            raise ValueError(f"Give numeric values for: {', '.join(sorted(unknown))}")
+
+        # One compiled function returning every quantity at once.
+        self._fn = sp.lambdify(self.symbols + [t], exprs, modules='numpy')
+
+    def call(self, args, t_arg, shape):
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            outputs = self._fn(*[a.astype(complex) for a in args], t_arg)
+        return np.array([np.broadcast_to(np.asarray(out, dtype=complex), shape) for out in outputs]).reshape(-1, *shape)
+
+    def evaluate(self, values, t=None):
+        # values: {param: scalar or array}; missing params keep their netlist
+        # value. Arrays broadcast against each other (and against t).
+        if self.uses_time and t is None:
+            raise ValueError("This circuit's response depends on time; pass t")
+        args = [np.asarray(values.get(name, self.defaults[name]), dtype=float) for name in self.params]
+        t_arg = np.asarray(0.0 if t is None else t, dtype=float)
+        shape = np.broadcast_shapes(*(a.shape for a in args), t_arg.shape)
+
+        # Complex arithmetic, so e.g. sqrt(R1**2 - 4*L1/C1) of an under-damped
+        # circuit stays finite; the results are real up to round-off.
+        outputs = self.call(args, t_arg, shape)
+        bad = ~np.isfinite(outputs).all(axis=0)
+        if bad.any():
+            below = self.call([a * (1 - SINGULAR_STEP) for a in args], t_arg, shape)
+            above = self.call([a * (1 + SINGULAR_STEP) for a in args], t_arg, shape)
+            outputs = np.where(bad, (below + above) / 2, outputs)
+        outputs = [as_real(out) for out in outputs]
+
+        n_nodes = len(self.node_names)
+        return {
+            'values': {name: np.broadcast_to(a, shape) for name, a in zip(self.params, args)},
+            'nodes': dict(zip(self.node_names, outputs[:n_nodes])),
+            'branches': dict(zip(self.branch_names, outputs[n_nodes:])),
+            'errors': dict(self.errors),
+        }
+
+
+def parametric_sweep(netlist_str, sweeps, t=None, cache=_sweep_cache):
+    # sweeps: {param: array of values}, e.g. {'R1': sweep_points(1e3, 1e5)}.
+    lines = [line for line in netlist_str.split('\n') if line.strip() and not line.startswith('#')]
+    key = (canonical_key(lines), tuple(sweeps))
+    sweep = cache.get_parametric(key) if cache is not None else None
+    if sweep is None:
+        sweep = ParametricSweep(lines, list(sweeps))
+        if cache is not None:
+            cache.put_parametric(key, sweep)
+    return sweep.evaluate(sweeps, t=t)
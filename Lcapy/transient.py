@@ -0,0 +1,236 @@
+import numpy as np
+import sympy as sp
+
+from Lcapy.mna_solver import MnaSystem, parse_value, MAX_CONDITION
+from Lcapy.sweep import sweep_elements
+
+METHODS = ('trapezoidal', 'backward_euler')
+DEFAULT_STEPS = 1000
+# Span shown when neither the circuit nor its sources have a time scale
+# (e.g. DC sources into resistors).
+DEFAULT_STOP_S = 1.0
+# The default step resolves every ringing and source period with at least
+# this many points, up to MAX_DEFAULT_STEPS steps in total.
+POINTS_PER_PERIOD = 20
+MAX_DEFAULT_STEPS = 200000
+
+
+def source_waveform(text):
+    # Value field of a V or I row -> f(t) over a NumPy array. Accepts what
+    # Lcapy accepts for the common cases: '5' or 'dc 5' (DC), 'step 5', and
+    # '{5*cos(100*t)}' style expressions of t (sin, cos, exp, u(t), ...).
+    text = text.strip()
+    parts = text.split()
+    if len(parts) == 2 and parts[0] == 'dc':
+        text = parts[1]
+    elif parts and parts[0] == 'ac':
+        raise ValueError(f"'{text}' is an AC phasor with no time-domain waveform; "
+                         f"use the Bode plot, or a value such as {{cos(2*pi*50*t)}}")
+    value = parse_value(text)
+    if value is not None:
+        return lambda t: np.full(np.shape(t), value)
+
+    if len(parts) == 2 and parts[0] == 'step':
+        value = parse_value(parts[1])
+        if value is None:
+            raise ValueError(f"Unsupported step value: {text}")
+        return lambda t: value * (np.asarray(t) >= 0)
+
+    t_sym, expr = source_expression(text)
+    fn = sp.lambdify(t_sym, expr, modules='numpy')
+    return lambda t: np.broadcast_to(np.asarray(fn(t), dtype=float), np.shape(t))
+
+
+def source_expression(text):
+    # '{...}' value -> (t, SymPy expression of t).
+    expr_text = text[1:-1] if text.startswith('{') and text.endswith('}') else text
+    t_sym = sp.Symbol('t', real=True)
+    # u(0) = 1: sources are already on at t = 0, as in the t >= 0 results.
+    heaviside = lambda arg: sp.Heaviside(arg, 1)
+    try:
+        expr = sp.sympify(expr_text, locals={'t': t_sym, 'u': heaviside, 'H': heaviside, 'Heaviside': heaviside})
+    except (sp.SympifyError, SyntaxError, TypeError) as e:
+        raise ValueError(f"Unsupported source value: {text}") from e
+    unknown = sorted(s.name for s in expr.free_symbols if s != t_sym)
+    if unknown:
+        raise ValueError(f"Source value {text} uses unknown symbols: {', '.join(unknown)}")
+    return t_sym, expr
+
+
+def source_time_scales(text):
+    # Periods of sin/cos terms and time constants of exp terms in a source
+    # value; empty for DC and step sources.
+    text = text.strip()
+    if parse_value(text) is not None or text.split()[0] in ('step', 'dc', 'ac'):
+        return []
+    t_sym, expr = source_expression(text)
+    scales = []
+    for term in expr.atoms(sp.sin, sp.cos, sp.exp):
+        rate = sp.diff(term.args[0], t_sym)
+        if rate.has(t_sym):
+            continue
+        rate = abs(complex(rate))
+        if rate > 0:
+            scales.append(2 * np.pi / rate if isinstance(term, (sp.sin, sp.cos)) else 1 / rate)
+    return scales
+
+
+class TransientSystem:
+    # C x' + G x = b(t) from the MNA stamps, integrated with a fixed step.
+    # Each step is the companion-model network: capacitors and inductors
+    # become a conductance plus a history source, which in matrix form is
+    #   backward Euler: (C/h + G) x1 = b1 + (C/h) x0
+    #   trapezoidal:    (2C/h + G) x1 = b1 + b0 + (2C/h - G) x0
+    # The left-hand matrix only depends on h, so it is inverted once.
+    def __init__(self, lines):
+        self.lines = [line for line in lines if line.strip() and not line.strip().startswith('#')]
+        self.elements = sweep_elements(self.lines)
+        if '0' not in {n for el in self.elements for n in el['nodes']}:
+            raise ValueError("No Ground Node (0) found.")
+
+        self.values = []
+        self.sources = []
+        self.source_scales = []
+        for el in self.elements:
+            if el['type'] in ('V', 'I'):
+                self.sources.append((el['name'], source_waveform(el['value'])))
+                self.source_scales.extend(source_time_scales(el['value']))
+                self.values.append(0.0)
+            elif el['type'] == 'W':
+                self.values.append(0.0)
+            else:
+                value = parse_value(el['value'])
+                if value is None or value <= 0:
+                    raise ValueError(f"{el['name']} needs a positive numeric value, got {el['value']}")
+                self.values.append(value)
+
+        self.system = MnaSystem(self.elements)
+        self.G, self.C, _ = self.system.stamp(self.values)
+        # b(t) = sum over sources of waveform(t) * unit stamp.
+        self.source_vectors = np.array([self.unit_stamp(name) for name, _ in self.sources]).reshape(-1, self.system.size)
+
+    def unit_stamp(self, name):
+        # self.values already holds 0 for every source.
+        values = [1.0 if el['name'] == name else v for el, v in zip(self.elements, self.values)]
+        return self.system.stamp(values)[2]
+
+    def source_matrix(self, t):
+        # (len(t), n_sources) source values, evaluated over the whole time array at once.
+        if not self.sources:
+            return np.zeros((len(t), 0))
+        return np.stack([fn(t) for _, fn in self.sources], axis=1)
+
+    def poles(self):
+        # C x' + G x = 0 is solved by x = v exp(p t) with p = -1/lambda for
+        # each eigenvalue lambda of G^-1 C; lambda = 0 carries no dynamics.
+        if self.system.size == 0 or np.linalg.cond(self.G) > MAX_CONDITION:
+            return np.array([], dtype=complex)
+        lam = np.linalg.eigvals(np.linalg.solve(self.G, self.C))
+        lam = lam[np.abs(lam) > 1e-12 * np.abs(lam).max(initial=0.0)]
+        return -1.0 / lam
+
+    def time_constants(self):
+        # Decay times 1/|Re p|; an undamped pole pair has none.
+        p = self.poles()
+        decay = np.abs(p.real)
+        return 1.0 / decay[decay > 1e-12 * np.abs(p)]
+
+    def ringing_periods(self):
+        p = self.poles()
+        ringing = np.abs(p.imag)
+        return 2 * np.pi / ringing[ringing > 1e-9 * np.abs(p)]
+
+    def default_stop(self):
+        # Five of the slowest decay time, ringing period or source period, so
+        # both the settling and a few cycles are visible.
+        scales = list(self.time_constants()) + list(self.ringing_periods()) + self.source_scales
+        if not scales:
+            return DEFAULT_STOP_S
+        return 5.0 * float(max(scales))
+
+    def default_step(self, t_stop):
+        step = t_stop / DEFAULT_STEPS
+        periods = list(self.ringing_periods()) + self.source_scales
+        if periods:
+            step = min(step, min(periods) / POINTS_PER_PERIOD)
+        return max(step, t_stop / MAX_DEFAULT_STEPS)
+
+    def initial_state(self):
+        # DC operating point with the sources at their t = 0- values (steps
+        # still off), i.e. capacitors open and inductors shorted. A circuit
+        # with no DC solution (e.g. series capacitors) starts from rest.
+        b0 = self.source_matrix(np.array([-np.finfo(float).tiny])) @ self.source_vectors
+        if self.system.size == 0 or np.linalg.cond(self.G) > MAX_CONDITION:
+            return np.zeros(self.system.size)
+        return np.linalg.solve(self.G, b0[0])
+
+    def start_state(self, b_start, step):
+        # The t = 0+ state: capacitor voltages and inductor currents carry
+        # over from t = 0-, everything else jumps with the sources. Found as
+        # one backward Euler step much shorter than the real one.
+        x_before = self.initial_state()
+        h = step * 1e-6
+        try:
+            return np.linalg.solve(self.C / h + self.G, b_start + self.C @ x_before / h)
+        except np.linalg.LinAlgError:
+            return x_before
+
+    def simulate(self, t_stop=None, step=None, method='trapezoidal'):
+        if method not in METHODS:
+            raise ValueError(f"Unknown method: {method} (expected one of {METHODS})")
+        t_stop = t_stop or self.default_stop()
+        step = step or self.default_step(t_stop)
+        n_steps = int(round(t_stop / step))
+        t = np.arange(n_steps + 1) * step
+
+        B = self.source_matrix(t) @ self.source_vectors
+        if method == 'trapezoidal':
+            A = 2.0 * self.C / step + self.G
+            history = 2.0 * self.C / step - self.G
+            rhs = B[1:] + B[:-1]
+        else:
+            A = self.C / step + self.G
+            history = self.C / step
+            rhs = B[1:]
+        if np.linalg.cond(A) > MAX_CONDITION:
+            raise ValueError("The circuit equations are singular (floating node or source loop?)")
+
+        # One inverse, then x1 = P x0 + q per step with q precomputed for all steps.
+        A_inv = np.linalg.inv(A)
+        P = A_inv @ history
+        Q = rhs @ A_inv.T
+
+        x = np.empty((n_steps + 1, self.system.size))
+        x[0] = self.start_state(B[0], step)
+        for k in range(n_steps):
+            x[k + 1] = P @ x[k] + Q[k]
+
+        return self.waveforms(t, x)
+
+    def waveforms(self, t, x):
+        voltages = {n: x[:, i] for n, i in self.system.node_index.items()}
+        ground = np.zeros(len(t))
+        waveforms = {name: fn(t) for name, fn in self.sources}
+
+        branches = {}
+        for el, value in zip(self.elements, self.values):
+            kind = el['type']
+            va = voltages.get(el['nodes'][0], ground)
+            vb = voltages.get(el['nodes'][1], ground)
+            if kind == 'R':
+                branches[el['name']] = (va - vb) / value
+            elif kind == 'C':
+                branches[el['name']] = value * np.gradient(va - vb, t)
+            elif kind == 'I':
+                # Lcapy convention, as in MnaSystem.element_currents.
+                branches[el['name']] = -waveforms[el['name']]
+            elif kind != 'W':
+                branches[el['name']] = x[:, self.system.branch_index[el['name']]]
+
+        return {'t': t, 'nodes': voltages, 'branches': branches}
+
+
+def simulate_transient(netlist_str, t_stop=None, step=None, method='trapezoidal'):
+    # Sampled node voltages and branch currents for t in [0, t_stop].
+    lines = [line for line in netlist_str.split('\n') if line.strip() and not line.startswith('#')]
+    return TransientSystem(lines).simulate(t_stop=t_stop, step=step, method=method)
@@ -2,6 +2,8 @@ from paddleocr import PaddleOCR
 import numpy as np
 import math
 
+from open_cv.spatial_index import GridIndex
+
 class CircuitOCR:
     def __init__(self, lang='en'):
         print("Initializing OCR Engine (PaddleOCR)...")
@@ -36,6 +38,19 @@ class CircuitOCR:
 
         print(f"OCR found {len(result[0])} text blocks. Filtering...")
 
+        comp_centers = []
+        comp_labels = []
+        for comp in components:
+            if isinstance(comp, dict):
+                bbox = comp['box']
+                comp_labels.append(comp.get('label', 'Unknown'))
+            else:
+                bbox = comp[:4] 
+                comp_labels.append('Component')
+            comp_centers.append(self.get_component_center(bbox))
+
+        comp_index = GridIndex(comp_centers, proximity_threshold)
+
         for line in result[0]:
             text_box = line[0]    
             text_str = line[1][0]
@@ -48,22 +63,11 @@ class CircuitOCR:
             is_near = False
             nearest_comp = "None"
 
-            
-            for comp in components:
-                if isinstance(comp, dict):
-                    bbox = comp['box']
-                    label = comp.get('label', 'Unknown')
-                else:
-                    bbox = comp[:4] 
-                    label = 'Component'
-
-                comp_center = self.get_component_center(bbox)
-                dist = self.calculate_distance(text_center, comp_center)
-
-                if dist < proximity_threshold:
-                    is_near = True
-                    nearest_comp = label
-                    break 
+            # First component (in detection order) inside the threshold, as before.
+            near_ids = comp_index.query_radius(text_center, proximity_threshold)
+            if near_ids:
+                is_near = True
+                nearest_comp = comp_labels[near_ids[0]]
 
             if is_near:
                 filtered_texts.append({
@@ -75,4 +79,125 @@ class CircuitOCR:
                 })
 
         print(f" OCR Filtered: {len(filtered_texts)} texts remain.")
-        return filtered_texts
\ No newline at end of file
+        return filtered_texts
+
+    def component_regions(self, components, shape, halo_scale=1.0, min_halo=40):
+        # Expanded boxes around each component where its value label can be,
+        # merged until no two overlap. Returns [x1, y1, x2, y2] int regions.
+        h_img, w_img = shape[:2]
+        regions = []
+        for comp in components:
+            box = comp.get('box', []) if isinstance(comp, dict) else comp[:4]
+            if len(box) != 4:
+                continue
+            x1, y1, x2, y2 = map(int, box)
+            halo = max(min_halo, int(halo_scale * max(x2 - x1, y2 - y1)))
+            regions.append([max(0, x1 - halo), max(0, y1 - halo), min(w_img, x2 + halo), min(h_img, y2 + halo)])
+        if not regions:
+            return []
+
+        regions = np.array(regions)
+        merged = True
+        while merged and len(regions) > 1:
+            merged = False
+            overlap = ((regions[:, None, 0] < regions[None, :, 2]) & (regions[None, :, 0] < regions[:, None, 2]) &
+                       (regions[:, None, 1] < regions[None, :, 3]) & (regions[None, :, 1] < regions[:, None, 3]))
+            np.fill_diagonal(overlap, False)
+            if overlap.any():
+                merged = True
+                i = int(np.argmax(overlap.any(axis=1)))
+                group = overlap[i].copy()
+                group[i] = True
+                union = [regions[group, 0].min(), regions[group, 1].min(),
+                         regions[group, 2].max(), regions[group, 3].max()]
+                regions = np.vstack([regions[~group], union])
+        return regions.tolist()
+
+    def region_gap(self, components, min_gap=16):
+        # Blank space between mosaic tiles: at least one text line, so labels
+        # on the edges of neighbouring tiles are not read as one line. Value
+        # labels are about as tall as the components are thick.
+        gap = min_gap
+        for comp in components:
+            box = comp.get('box', []) if isinstance(comp, dict) else comp[:4]
+            if len(box) == 4:
+                x1, y1, x2, y2 = map(int, box)
+                gap = max(gap, min(x2 - x1, y2 - y1))
+        return gap
+
+    def pack_regions(self, regions, gap=16):
+        # Shelf-packs the crops into one mosaic so a single OCR call covers
+        # them all. Returns the mosaic size and each crop's (x, y) in it.
+        sizes = [(x2 - x1, y2 - y1) for x1, y1, x2, y2 in regions]
+        total_area = sum((w + gap) * (h + gap) for w, h in sizes)
+        width = max(max(w for w, _ in sizes), int(math.sqrt(total_area) * 1.2))
+
+        order = sorted(range(len(regions)), key=lambda i: -sizes[i][1])
+        offsets = [None] * len(regions)
+        x = y = shelf_h = 0
+        for i in order:
+            w, h = sizes[i]
+            if x > 0 and x + w > width:
+                x, y = 0, y + shelf_h + gap
+                shelf_h = 0
+            offsets[i] = (x, y)
+            x += w + gap
+            shelf_h = max(shelf_h, h)
+        return (width, y + shelf_h), offsets
+
+    def ocr_regions(self, img, components, halo_scale=1.0, min_halo=40, gap=None):
+        # Text detection/recognition only around the components: the halos
+        # are packed into one mosaic, OCR'd once, and the boxes mapped back
+        # to page coordinates. Output has the same layout as PaddleOCR.ocr().
+        regions = self.component_regions(components, img.shape, halo_scale, min_halo)
+        if not regions:
+            return [[]]
+        if gap is None:
+            gap = self.region_gap(components)
+
+        (width, height), offsets = self.pack_regions(regions, gap)
+        if width * height >= img.shape[0] * img.shape[1]:
+            # Halos cover most of the page; the mosaic would not save anything.
+            return self.ocr.ocr(img, cls=True)
+
+        mosaic = np.full((height, width) + img.shape[2:], 255, dtype=img.dtype)
+        for (x1, y1, x2, y2), (ox, oy) in zip(regions, offsets):
+            mosaic[oy:oy + y2 - y1, ox:ox + x2 - x1] = img[y1:y2, x1:x2]
+
+        result = self.ocr.ocr(mosaic, cls=True)
+        if not result or not result[0]:
+            return [[]]
+
+        tiles = np.array([[ox, oy, ox + x2 - x1, oy + y2 - y1] for (x1, y1, x2, y2), (ox, oy) in zip(regions, offsets)])
+        lines = []
+        reread = set()
+        for pts, rec in result[0]:
+            xs, ys = [p[0] for p in pts], [p[1] for p in pts]
+            touched = np.flatnonzero((tiles[:, 0] < max(xs)) & (min(xs) < tiles[:, 2]) &
+                                     (tiles[:, 1] < max(ys)) & (min(ys) < tiles[:, 3]))
+            if len(touched) > 1:
+                # One line across a tile boundary mixes two regions' labels;
+                # those regions are read again on their own.
+                reread.update(touched.tolist())
+                continue
+            cx, cy = self.get_center(pts)
+            hit = np.flatnonzero((tiles[:, 0] <= cx) & (cx < tiles[:, 2]) & (tiles[:, 1] <= cy) & (cy < tiles[:, 3]))
+            if not len(hit):
+                continue
+            lines.append((hit[0], pts, rec))
+
+        page_lines = []
+        for t, pts, rec in lines:
+            if t in reread:
+                continue
+            dx, dy = regions[t][0] - tiles[t][0], regions[t][1] - tiles[t][1]
+            page_lines.append([[[p[0] + dx, p[1] + dy] for p in pts], rec])
+        for t in sorted(reread):
+            x1, y1, x2, y2 = regions[t]
+            tile_result = self.ocr.ocr(img[y1:y2, x1:x2], cls=True)
+            if not tile_result or not tile_result[0]:
+                continue
+            for pts, rec in tile_result[0]:
+                page_lines.append([[[p[0] + x1, p[1] + y1] for p in pts], rec])
+        return [page_lines]
+
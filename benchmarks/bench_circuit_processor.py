@@ -0,0 +1,169 @@
+import sys
+import os
+import copy
+import json
+import argparse
+import statistics
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+project_root = os.path.dirname(current_dir)
+
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from benchmarks.synthetic_circuits import image_size, make_synthetic_circuit, node_partition, netlist_nodes, truth_netlist
+from open_cv.circuit_logic import CircuitProcessor
+from open_cv.overlays import RENDER_NONE
+from Lcapy.circuit_analysis import analyze_netlist
+from profiling.stage_timer import StageTimer
+
+FULL_MEGAPIXELS = [1, 4, 12, 24, 40]
+FULL_COMPONENTS = [5, 20, 50, 100, 200, 500]
+QUICK_MEGAPIXELS = [1, 4]
+QUICK_COMPONENTS = [5, 50]
+
+
+def check_result(processor, circuit, netlist):
+    truth = circuit['truth']
+    nodes, values = netlist_nodes(netlist)
+    nodes_ok = len(nodes) == len(truth['nodes']) and node_partition(nodes) == node_partition(truth['nodes'])
+
+    expected = [processor.format_matched_value(processor.clean_text_value(v)) for v in truth['values']]
+    matched = sum(1 for got, want in zip(values, expected) if got == want)
+    return nodes_ok, matched / len(expected) if expected else 1.0
+
+
+def run_process_nodes(processor, circuit, track_memory=False, normalize_resolution=False):
+    timer = StageTimer(track_memory=track_memory)
+    try:
+        with timer.span('process_nodes'):
+            _, _, netlist = processor.process_nodes(
+                circuit['image'], copy.deepcopy(circuit['components']),
+                copy.deepcopy(circuit['text_data']), render=RENDER_NONE, timer=timer,
+                normalize_resolution=normalize_resolution)
+    finally:
+        timer.close()
+    return timer, netlist
+
+
+def run_analysis(netlist):
+    timer = StageTimer()
+    analyze_netlist(netlist, cache=None, timer=timer)
+    return timer.totals().get('analyze_netlist', 0.0)
+
+
+def median_stages(timers):
+    by_name = {}
+    for timer in timers:
+        for s in timer.stages:
+            by_name.setdefault(s['name'], []).append(s['wall_s'])
+    return {name: statistics.median(walls) for name, walls in by_name.items()}
+
+
+def bench_case(processor, megapixels, n_components, repeat, seed, track_memory, symbolic_limit,
+               normalize_resolution=False):
+    width, height = image_size(megapixels)
+    circuit = make_synthetic_circuit(width, height, n_components, seed=seed)
+
+    timers = []
+    netlist = ""
+    for _ in range(repeat):
+        timer, netlist = run_process_nodes(processor, circuit, normalize_resolution=normalize_resolution)
+        timers.append(timer)
+    nodes_ok, value_rate = check_result(processor, circuit, netlist)
+
+    row = {
+        'megapixels': megapixels,
+        'width': width,
+        'height': height,
+        'requested_components': n_components,
+        'components': len(circuit['truth']['nodes']),
+        'nodes_ok': nodes_ok,
+        'value_match_rate': value_rate,
+        'stages_s': median_stages(timers),
+    }
+
+    if track_memory:
+        timer, _ = run_process_nodes(processor, circuit, track_memory=True,
+                                     normalize_resolution=normalize_resolution)
+        row['peak_bytes'] = {s['name']: s['peak_bytes'] for s in timer.stages}
+        row['peak_rss_kb'] = timer.stages[-1].get('peak_rss_kb')
+
+    numeric = truth_netlist(circuit['truth'])
+    row['analyze_numeric_s'] = statistics.median(run_analysis(numeric) for _ in range(repeat))
+    if row['components'] <= symbolic_limit:
+        row['analyze_symbolic_s'] = run_analysis(truth_netlist(circuit['truth'], symbolic=True))
+
+    return row
+
+
+def format_row(row):
+    stages = row['stages_s']
+    line = (f"{row['megapixels']:>5} MP {row['components']:>4} comps | "
+            f"process_nodes {stages.get('process_nodes', 0) * 1000:8.1f} ms "
+            f"(merge {stages.get('process_nodes/merge_text_and_symbols', 0) * 1000:6.2f}, "
+            f"dilate {stages.get('process_nodes/threshold_dilate', 0) * 1000:7.1f}, "
+            f"cc {stages.get('process_nodes/connected_components', 0) * 1000:7.1f}, "
+            f"nodes {stages.get('process_nodes/node_mapping', 0) * 1000:7.1f}) | "
+            f"analyze {row['analyze_numeric_s'] * 1000:7.1f} ms")
+    if 'analyze_symbolic_s' in row:
+        line += f" / symbolic {row['analyze_symbolic_s']:6.2f} s"
+    if 'peak_bytes' in row:
+        line += f" | peak {row['peak_bytes'].get('process_nodes', 0) / 1e6:7.1f} MB"
+    line += f" | nodes {'ok' if row['nodes_ok'] else 'WRONG'}, values {row['value_match_rate']:.0%}"
+    return line
+
+
+def parse_list(text, cast):
+    return [cast(v) for v in text.split(',') if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark node extraction and analysis on synthetic schematics.")
+    parser.add_argument('--quick', action='store_true', help="Small sweep for a fast sanity check")
+    parser.add_argument('--megapixels', default=None, help="Comma-separated image sizes in megapixels")
+    parser.add_argument('--components', default=None, help="Comma-separated component counts")
+    parser.add_argument('-r', '--repeat', type=int, default=3, help="Runs per case; the median is reported")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--track-memory', action='store_true', help="Add a traced-memory run per case")
+    parser.add_argument('--symbolic-limit', type=int, default=10,
+                        help="Also time the Lcapy path for circuits up to this many components")
+    parser.add_argument('--normalize-resolution', action='store_true',
+                        help="Run node extraction in resolution-normalized mode")
+    parser.add_argument('--json', default=None, help="Write all results to this JSON file")
+    args = parser.parse_args()
+
+    if args.megapixels:
+        megapixels = parse_list(args.megapixels, float)
+    else:
+        megapixels = QUICK_MEGAPIXELS if args.quick else FULL_MEGAPIXELS
+    if args.components:
+        components = parse_list(args.components, int)
+    else:
+        components = QUICK_COMPONENTS if args.quick else FULL_COMPONENTS
+    repeat = 1 if args.quick else args.repeat
+
+    processor = CircuitProcessor()
+    rows = []
+    failures = 0
+    for mp in megapixels:
+        for n in components:
+            row = bench_case(processor, mp, n, repeat, args.seed, args.track_memory, args.symbolic_limit,
+                             normalize_resolution=args.normalize_resolution)
+            rows.append(row)
+            if not row['nodes_ok']:
+                failures += 1
+            print(format_row(row), flush=True)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2)
+        print(f"Results written to {args.json}")
+
+    if failures:
+        print(f"{failures} case(s) extracted the wrong nodes.")
+
+
+if __name__ == "__main__":
+    main()
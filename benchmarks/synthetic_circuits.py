@@ -0,0 +1,195 @@
+import random
+
+import cv2
+import numpy as np
+
+COMPONENT_KINDS = [
+    ('resistor', ['10k', '4.7k', '220', '1M', '33k']),
+    ('capacitor', ['10uF', '2.2nF', '100pF']),
+    ('inductor', ['5mH', '2H']),
+]
+
+
+def image_size(megapixels, aspect=4 / 3):
+    width = int(round((megapixels * 1e6 * aspect) ** 0.5))
+    height = int(round(width / aspect))
+    return width, height
+
+
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, a):
+        while self.parent[a] != a:
+            self.parent[a] = self.parent[self.parent[a]]
+            a = self.parent[a]
+        return a
+
+    def union(self, a, b):
+        self.parent[self.find(a)] = self.find(b)
+
+
+def make_synthetic_circuit(width, height, n_components, seed=0, wire_prob=0.6, symbol_prob=0.2):
+    # Draws a grid of junctions joined by plain wires or components and
+    # returns the image, YOLO-style component boxes, OCR-style text boxes and
+    # the ground-truth node of every component terminal. Every kept node is
+    # touched by at least two components, as process_nodes requires.
+    rng = random.Random(seed)
+
+    k = 2
+    while 2 * k * (k - 1) < 2 * n_components:
+        k += 1
+    spacing = min(width, height) / (k + 1)
+    x0 = (width - spacing * (k - 1)) / 2
+    y0 = (height - spacing * (k - 1)) / 2
+    thickness = max(2, int(spacing / 40))
+
+    def junction(r, c):
+        return int(round(x0 + c * spacing)), int(round(y0 + r * spacing))
+
+    edges = []
+    for r in range(k):
+        for c in range(k):
+            if c + 1 < k: edges.append(((r, c), (r, c + 1)))
+            if r + 1 < k: edges.append(((r, c), (r + 1, c)))
+    rng.shuffle(edges)
+
+    def trimmed_components(count):
+        comp_edges = edges[:count]
+        wire_edges = [e for e, keep in zip(edges[count:], wire_draws[count:]) if keep]
+        uf = _UnionFind(k * k)
+        for a, b in wire_edges:
+            uf.union(index[a], index[b])
+
+        # Drop shorted components and components left with a dangling terminal.
+        kept = [e for e in comp_edges if uf.find(index[e[0]]) != uf.find(index[e[1]])]
+        while True:
+            degree = {}
+            for a, b in kept:
+                for j in (a, b):
+                    root = uf.find(index[j])
+                    degree[root] = degree.get(root, 0) + 1
+            trimmed = [e for e in kept if degree[uf.find(index[e[0]])] >= 2 and degree[uf.find(index[e[1]])] >= 2]
+            if len(trimmed) == len(kept):
+                return kept, wire_edges, uf
+            kept = trimmed
+
+    index = {(r, c): r * k + c for r in range(k) for c in range(k)}
+    wire_draws = [rng.random() < wire_prob for _ in edges]
+
+    # Trimming loses components, so place more until enough survive.
+    count = n_components
+    kept, wire_edges, uf = trimmed_components(count)
+    while len(kept) < n_components and count < len(edges):
+        count += 1
+        kept, wire_edges, uf = trimmed_components(count)
+
+    image = np.full((height, width, 3), 255, dtype=np.uint8)
+    for a, b in wire_edges:
+        cv2.line(image, junction(*a), junction(*b), (0, 0, 0), thickness)
+
+    components = []
+    text_data = []
+    truth_nodes = []
+    truth_values = []
+    font_scale = spacing / 250
+    font_thickness = max(1, thickness // 2)
+    counters = {}
+
+    for a, b in kept:
+        (xa, ya), (xb, yb) = junction(*a), junction(*b)
+        horizontal = ya == yb
+        length = 0.4 * spacing
+        girth = 0.25 * spacing
+        cx, cy = (xa + xb) / 2, (ya + yb) / 2
+        if horizontal:
+            box = (int(cx - length / 2), int(cy - girth / 2), int(cx + length / 2), int(cy + girth / 2))
+            cv2.line(image, (xa, ya), (box[0], ya), (0, 0, 0), thickness)
+            cv2.line(image, (box[2], ya), (xb, yb), (0, 0, 0), thickness)
+        else:
+            box = (int(cx - girth / 2), int(cy - length / 2), int(cx + girth / 2), int(cy + length / 2))
+            cv2.line(image, (xa, ya), (xa, box[1]), (0, 0, 0), thickness)
+            cv2.line(image, (xa, box[3]), (xb, yb), (0, 0, 0), thickness)
+        # The symbol stays inside its box so masking the box removes it.
+        inset = thickness
+        cv2.rectangle(image, (box[0] + inset, box[1] + inset), (box[2] - inset, box[3] - inset), (0, 0, 0), thickness)
+
+        kind, values = rng.choice(COMPONENT_KINDS)
+        counters[kind] = counters.get(kind, 0) + 1
+        components.append({'name': f"{kind}_{counters[kind]}", 'box': box, 'conf': 1.0})
+
+        value = rng.choice(values)
+        use_symbol = kind == 'resistor' and rng.random() < symbol_prob
+        text = value.rstrip('k').rstrip('M') if use_symbol else value
+        (tw, th), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, font_thickness)
+        if horizontal:
+            tx, ty = box[0], box[1] - int(0.08 * spacing)
+        else:
+            tx, ty = box[2] + int(0.08 * spacing), int(cy + th / 2)
+        cv2.putText(image, text, (tx, ty), cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 0, 0), font_thickness)
+        text_box = [tx, ty - th, tx + tw, ty + 2]
+        text_data.append({'text': text, 'box': text_box, 'conf': 1.0})
+
+        if use_symbol:
+            sx = text_box[2] + 2
+            symbol_box = (sx, text_box[1], sx + th, text_box[3])
+            cv2.circle(image, ((symbol_box[0] + symbol_box[2]) // 2, (symbol_box[1] + symbol_box[3]) // 2),
+                       max(2, th // 2), (0, 0, 0), font_thickness)
+            components.append({'name': f"ohm_symbol_{counters[kind]}", 'box': symbol_box, 'conf': 1.0})
+            value = text + 'ohm'
+
+        truth_nodes.append((uf.find(index[a]), uf.find(index[b])))
+        truth_values.append(value)
+
+    return {
+        'image': image,
+        'components': components,
+        'text_data': text_data,
+        'truth': {'nodes': truth_nodes, 'values': truth_values},
+        'grid': k,
+        'spacing': spacing,
+    }
+
+
+def node_partition(component_nodes):
+    # Node -> set of component indices, compared without caring about names.
+    groups = {}
+    for i, nodes in enumerate(component_nodes):
+        for n in nodes:
+            groups.setdefault(n, set()).add(i)
+    return sorted(tuple(sorted(g)) for g in groups.values())
+
+
+def netlist_nodes(netlist):
+    nodes = []
+    values = []
+    for line in netlist.splitlines():
+        parts = line.split()
+        if len(parts) < 4 or line.startswith('#'):
+            continue
+        nodes.append((parts[1], parts[2]))
+        values.append(parts[3])
+    return nodes, values
+
+
+def truth_netlist(truth, symbolic=False):
+    # Resistive netlist over the true nodes, with a source and a 1M leak from
+    # every node to ground so the system is always solvable.
+    names = {}
+    for a, b in truth['nodes']:
+        for n in (a, b):
+            if n not in names:
+                names[n] = str(len(names))
+
+    def value(v):
+        return f"{{{v}}}" if symbolic else v
+
+    lines = []
+    for i, (a, b) in enumerate(truth['nodes']):
+        lines.append(f"R{i+1} {names[a]} {names[b]} {value('1k')}")
+    top = max(names.values(), key=int) if len(names) > 1 else '1'
+    lines.append(f"V1 {top} 0 {value('5')}")
+    for n in sorted(set(names.values()) - {'0'}, key=int):
+        lines.append(f"RG{n} {n} 0 {value('1M')}")
+    return "\n".join(lines)
@@ -5,7 +5,6 @@ import cv2
 import os
 import threading
 import sys
-import re 
 
 
 def get_base_path():
@@ -19,15 +18,17 @@ project_root = get_base_path()
 if project_root not in sys.path:
     sys.path.append(project_root)
 
-try:
-    from yolo.yolo_user_function.detector import YoloDetector
-    from open_cv.circuit_logic import CircuitProcessor
-    from OCR.ocr_engine import CircuitOCR
-    from Lcapy.circuit_analysis import analyze_netlist 
-except ImportError as e:
-    print(f"Import Error: {e}")
+# Only light modules are imported here; ultralytics, paddleocr and lcapy
+# are loaded by the warm-up thread once the window is up.
+from pipeline.circuit_pipeline import CircuitPipeline, WARM_UP_STAGES
+from pipeline.inference_cache import InferenceCache
+from open_cv.overlays import resolve_overlay
+from Lcapy.analysis_pool import AnalysisPool
 
 MODEL_PATH = os.path.join(project_root, 'yolo', 'weights', 'best.pt')
+CACHE_DIR = os.path.join(project_root, '.cache')
+MODEL_TITLES = {'detector': "YOLO", 'ocr': "OCR", 'analysis': "Lcapy"}
+ANALYSIS_TIMEOUT_S = 30
 
 ctk.set_appearance_mode("Dark")
 ctk.set_default_color_theme("blue")
@@ -39,19 +40,22 @@ class CircuitApp(ctk.CTk):
         
         self.after(0, lambda: self.state('zoomed')) 
 
-        try:
-            self.detector = YoloDetector(MODEL_PATH)
-            self.processor = CircuitProcessor()
-            self.ocr = CircuitOCR()
-            print("System Ready.")
-        except Exception as e:
-            print(f"Init Warning: {e}")
+        self.pipeline = CircuitPipeline(MODEL_PATH, cache=InferenceCache(CACHE_DIR), concurrent_ocr=True, load=False)
+        self.model_status = {}
+        self.models_ready = False
+        self.pending_upload = False
+        # Lcapy runs in a separate process so a netlist it cannot solve
+        # never freezes the window; see run_lcapy_analysis.
+        self.analysis_pool = AnalysisPool(workers=1, timeout_s=ANALYSIS_TIMEOUT_S)
+        self.analysis_job = None
 
         self.current_image_path = None
         self.netlist_rows = [] 
         self.result_widgets = [] 
         self.setup_ui()
 
+        threading.Thread(target=self.warm_up_thread, daemon=True).start()
+
     def setup_ui(self):
         self.grid_columnconfigure(1, weight=1)
         self.grid_rowconfigure(0, weight=1)
@@ -81,6 +85,14 @@ class CircuitApp(ctk.CTk):
                                          anchor="w", command=self.show_raw_frame)
         self.btn_nav_raw.grid(row=3, column=0, sticky="ew")
 
+        self.frame_models = ctk.CTkFrame(self.sidebar, fg_color="transparent")
+        self.frame_models.grid(row=4, column=0, padx=20, pady=(30, 0), sticky="ew")
+        self.model_labels = {}
+        for stage, title in MODEL_TITLES.items():
+            lbl = ctk.CTkLabel(self.frame_models, text=f"{title}: loading...", text_color="gray", anchor="w")
+            lbl.pack(fill="x")
+            self.model_labels[stage] = lbl
+
         self.status_label = ctk.CTkLabel(self.sidebar, text="Waiting for input...", text_color="gray")
         self.status_label.grid(row=6, column=0, padx=20, pady=20, sticky="s")
 
@@ -99,6 +111,29 @@ class CircuitApp(ctk.CTk):
 
         self.show_analysis_frame()
 
+    def warm_up_thread(self):
+        self.pipeline.warm_up(callback=lambda stage, error: self.after(0, lambda: self.set_model_status(stage, error)))
+
+        error = self.analysis_pool.wait_ready()
+        if error is None:
+            error = self.analysis_pool.analyze("V1 1 0 step 5\nR1 1 0 1k").error
+        self.after(0, lambda: self.set_model_status('analysis', error))
+
+    def set_model_status(self, stage, error):
+        self.model_status[stage] = error
+        title = MODEL_TITLES[stage]
+        if error is None:
+            self.model_labels[stage].configure(text=f"{title}: ready", text_color="#2ECC71")
+        else:
+            print(f"{title} failed to load: {error}")
+            self.model_labels[stage].configure(text=f"{title}: failed", text_color="#E74C3C")
+
+        if not self.models_ready and all(s in self.model_status for s in WARM_UP_STAGES):
+            self.models_ready = True
+            if self.pending_upload:
+                self.pending_upload = False
+                self.start_processing()
+
     def show_analysis_frame(self):
         self.frame_visual.grid_forget()
         self.frame_raw.grid_forget()
@@ -257,9 +292,21 @@ class CircuitApp(ctk.CTk):
         self.btn_add_comp = ctk.CTkButton(self.frame_actions, text="+ Add Manual Component", command=self.add_manual_row, fg_color="#5D6D7E", height=35)
         self.btn_add_comp.pack(side="left", padx=5, expand=True, fill="x")
         
+        self.btn_sweep = ctk.CTkButton(self.frame_actions, text="Sweep Value", command=self.open_sweep_dialog, fg_color="#2874A6", height=35)
+        self.btn_sweep.pack(side="left", padx=5, expand=True, fill="x")
+
+        self.btn_bode = ctk.CTkButton(self.frame_actions, text="Bode Plot", command=self.run_ac_sweep, fg_color="#2874A6", height=35)
+        self.btn_bode.pack(side="left", padx=5, expand=True, fill="x")
+
+        self.btn_transient = ctk.CTkButton(self.frame_actions, text="Transient", command=self.run_transient, fg_color="#2874A6", height=35)
+        self.btn_transient.pack(side="left", padx=5, expand=True, fill="x")
+
         self.btn_calc = ctk.CTkButton(self.frame_actions, text=" RUN ANALYSIS", command=self.run_lcapy_analysis, fg_color="#27AE60", hover_color="#2ECC71", height=35, font=("Arial", 14, "bold"))
         self.btn_calc.pack(side="right", padx=5, expand=True, fill="x")
 
+        self.btn_stop = ctk.CTkButton(self.frame_actions, text="Stop", command=self.stop_lcapy_analysis, fg_color="#C0392B", hover_color="#E74C3C", height=35, width=70, state="disabled")
+        self.btn_stop.pack(side="right", padx=5)
+
         self.lbl_result_title = ctk.CTkLabel(self.panel_right_ana, text=" Analysis Results", font=("Arial", 18, "bold"))
         self.lbl_result_title.grid(row=3, column=0, sticky="w", pady=(10, 5))
         
@@ -281,46 +328,22 @@ class CircuitApp(ctk.CTk):
             self.status_label.configure(text="Processing Image...")
             self.populate_editor_from_text("")
             self.clear_results()
-            self.start_processing()
+            if self.models_ready:
+                self.start_processing()
+            else:
+                # Picked up by set_model_status once the warm-up finishes.
+                self.pending_upload = True
+                self.status_label.configure(text="Waiting for models...")
 
     def start_processing(self):
         threading.Thread(target=self.process_thread, daemon=True).start()
 
     def process_thread(self):
         try:
-            detect_plot, components = self.detector.detect(self.current_image_path)
-            
-            img = cv2.imread(self.current_image_path)
+            result = self.pipeline.process(self.current_image_path)
             
-            img_for_ocr = img.copy()
-            for comp in components:
-                if 'box' in comp:
-                    x1, y1, x2, y2 = map(int, comp['box'])
-                    cv2.rectangle(img_for_ocr, (x1, y1), (x2, y2), (255, 255, 255), -1)
-
-            try:
-                full_ocr = self.ocr.ocr.ocr(img_for_ocr, cls=True) 
-            except:
-                full_ocr = []
-
-            ocr_vis_img = img.copy()
-
-            formatted_ocr = []
-            if full_ocr and full_ocr[0]:
-                for line in full_ocr[0]:
-                    pts = line[0]
-                    text = line[1][0]
-                    xs, ys = [p[0] for p in pts], [p[1] for p in pts]
-                    x1, y1, x2, y2 = int(min(xs)), int(min(ys)), int(max(xs)), int(max(ys))
-                    
-                    formatted_ocr.append({'text': text, 'box': [x1, y1, x2, y2], 'conf': line[1][1]})
-                    
-                    cv2.rectangle(ocr_vis_img, (x1, y1), (x2, y2), (255, 0, 0), 2)
-                    cv2.putText(ocr_vis_img, text, (x1, y1-5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
-
-            vis, final, netlist = self.processor.process_nodes(img, components, text_data=formatted_ocr)
-            
-            self.after(0, lambda: self.update_ui_results(detect_plot, ocr_vis_img, vis, final, netlist, formatted_ocr, components))
+            self.after(0, lambda: self.update_ui_results(result['detect_plot'], result['ocr_vis'], result['clean'], result['schematic'],
+                                                         result['netlist'], result['ocr_data'], result['components']))
 
         except Exception as e:
             self.after(0, lambda: messagebox.showerror("Error", str(e)))
@@ -429,25 +452,233 @@ class CircuitApp(ctk.CTk):
             elif len(parts) == 3: 
                 self.add_netlist_row(parts[0], parts[1], parts[2], "?", unit_guess, is_ai_generated=True)
 
-    def run_lcapy_analysis(self):
+    def editor_netlist(self):
         lines = []
         for row in self.netlist_rows:
             if row['active']:
                 e = row['entries']
                 lines.append(f"{e['name'].get()} {e['n1'].get()} {e['n2'].get()} {e['val'].get()}")
-        
-        netlist_str = "\n".join(lines)
+        return "\n".join(lines)
+
+    def run_lcapy_analysis(self):
+        netlist_str = self.editor_netlist()
         self.clear_results()
-        
+
+        # A new run replaces one still solving; its worker is replaced too.
+        if self.analysis_job is not None and not self.analysis_job.done():
+            self.analysis_pool.cancel(self.analysis_job)
+        job = self.analysis_pool.submit(netlist_str, on_partial=lambda q: self.after(0, self.show_analysis_progress))
+        self.analysis_job = job
+        self.btn_stop.configure(state="normal")
+        self.status_label.configure(text="Solving...", text_color="gray")
+
+        def run_task():
+            job.wait()
+            self.after(0, lambda: self.finish_analysis(job))
+
+        threading.Thread(target=run_task, daemon=True).start()
+
+    def stop_lcapy_analysis(self):
+        if self.analysis_job is not None:
+            self.analysis_pool.cancel(self.analysis_job)
+
+    def show_analysis_progress(self):
+        job = self.analysis_job
+        if job is not None and not job.done():
+            self.status_label.configure(text=f"Solving... {len(job.finished_nodes)} nodes done")
+
+    def finish_analysis(self, job):
+        if job is not self.analysis_job:
+            return
+        self.btn_stop.configure(state="disabled")
+        if job.status == 'done':
+            self.status_label.configure(text=f"Analysis done in {job.elapsed_s:.1f}s", text_color="gray")
+        else:
+            self.status_label.configure(text=f"Analysis {job.status}", text_color="#E74C3C")
+
+        if job.result is None:
+            self.populate_results(job.to_log(), is_error=True)
+        else:
+            self.populate_results(job.result)
+
+    def run_ac_sweep(self):
+        netlist_str = self.editor_netlist()
+        self.clear_results()
+
+        def run_task():
+            try:
+                from Lcapy.ac_sweep import ac_sweep
+                result = ac_sweep(netlist_str)
+                self.after(0, lambda: self.show_bode_plot(result))
+            except Exception as e:
+                message = f"AC Sweep Failed:\n{e}"
+                self.after(0, lambda: self.populate_results(message, is_error=True))
+
+        threading.Thread(target=run_task, daemon=True).start()
+
+    def run_transient(self):
+        netlist_str = self.editor_netlist()
+        self.clear_results()
+
         def run_task():
             try:
-                result_str = analyze_netlist(netlist_str)
-                self.after(0, lambda: self.populate_results(result_str))
+                from Lcapy.transient import simulate_transient
+                result = simulate_transient(netlist_str)
+                self.after(0, lambda: self.show_transient_plot(result))
             except Exception as e:
-                self.after(0, lambda: self.populate_results(f"Error:\n{e}", is_error=True))
+                message = f"Transient Simulation Failed:\n{e}"
+                self.after(0, lambda: self.populate_results(message, is_error=True))
 
         threading.Thread(target=run_task, daemon=True).start()
 
+    def show_result_figure(self, title, fig):
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+        self.clear_results()
+        lbl = ctk.CTkLabel(self.result_scroll, text=title, font=("Arial", 12, "bold"), text_color="#3498DB")
+        lbl.grid(row=1, column=0, columnspan=3, sticky="w", pady=(10,2), padx=5)
+        self.result_widgets.append(lbl)
+
+        canvas = FigureCanvasTkAgg(fig, master=self.result_scroll)
+        canvas.draw()
+        widget = canvas.get_tk_widget()
+        widget.grid(row=2, column=0, columnspan=3, sticky="nsew", padx=5, pady=5)
+        self.result_widgets.append(widget)
+
+    def show_bode_plot(self, result):
+        import matplotlib
+        matplotlib.use("TkAgg")
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=(5, 4.5), dpi=100)
+        ax_mag = fig.add_subplot(211)
+        ax_phase = fig.add_subplot(212, sharex=ax_mag)
+        f = result['frequencies']
+        for n in result['response']:
+            ax_mag.semilogx(f, result['magnitude_db'][n], label=f"V({n})")
+            ax_phase.semilogx(f, result['phase_deg'][n], label=f"V({n})")
+        ax_mag.set_ylabel("Magnitude (dB)")
+        ax_phase.set_ylabel("Phase (deg)")
+        ax_phase.set_xlabel("Frequency (Hz)")
+        for ax in (ax_mag, ax_phase):
+            ax.grid(True, which="both", alpha=0.3)
+        ax_mag.legend(loc="best", fontsize=8)
+        fig.tight_layout()
+        self.show_result_figure(f">> AC Response to {result['input']} (unit input):", fig)
+
+    def show_transient_plot(self, result):
+        import matplotlib
+        matplotlib.use("TkAgg")
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=(5, 4.5), dpi=100)
+        ax_v = fig.add_subplot(211)
+        ax_i = fig.add_subplot(212, sharex=ax_v)
+        t = result['t']
+        for n, v in result['nodes'].items():
+            ax_v.plot(t, v, label=f"V({n})")
+        for key, i in result['branches'].items():
+            ax_i.plot(t, i, label=f"I({key})")
+        ax_v.set_ylabel("Voltage (V)")
+        ax_i.set_ylabel("Current (A)")
+        ax_i.set_xlabel("Time (s)")
+        for ax in (ax_v, ax_i):
+            ax.grid(True, alpha=0.3)
+            ax.legend(loc="best", fontsize=8)
+        fig.tight_layout()
+        self.show_result_figure(">> Transient Simulation (t ≥ 0):", fig)
+
+    def open_sweep_dialog(self):
+        netlist_str = self.editor_netlist()
+        names = [line.split()[0] for line in netlist_str.split('\n')
+                 if line.strip() and line.split()[0][0] in 'RCLVI']
+        if not names:
+            messagebox.showinfo("Sweep", "Add components to the netlist first.")
+            return
+
+        win = ctk.CTkToplevel(self)
+        win.title("Parametric Sweep")
+        win.geometry("820x620")
+        win.grid_columnconfigure(0, weight=1)
+        win.grid_rowconfigure(1, weight=1)
+
+        controls = ctk.CTkFrame(win)
+        controls.grid(row=0, column=0, sticky="ew", padx=10, pady=10)
+        comp_var = ctk.StringVar(value=names[0])
+        scale_var = ctk.StringVar(value="log")
+        ctk.CTkLabel(controls, text="Component").pack(side="left", padx=(10, 3))
+        ctk.CTkOptionMenu(controls, variable=comp_var, values=names, width=90).pack(side="left", padx=3)
+
+        fields = {}
+        for key, label, default in (('start', "From", "1k"), ('stop', "To", "100k"), ('points', "Points", "1000"),
+                                    ('t', "t (s)", "")):
+            ctk.CTkLabel(controls, text=label).pack(side="left", padx=(10, 3))
+            entry = ctk.CTkEntry(controls, width=70)
+            entry.insert(0, default)
+            entry.pack(side="left", padx=3)
+            fields[key] = entry
+        ctk.CTkOptionMenu(controls, variable=scale_var, values=["log", "linear"], width=80).pack(side="left", padx=10)
+
+        plot_frame = ctk.CTkFrame(win)
+        plot_frame.grid(row=1, column=0, sticky="nsew", padx=10, pady=(0, 10))
+        status = ctk.CTkLabel(win, text="", text_color="gray")
+        status.grid(row=2, column=0, sticky="w", padx=10, pady=(0, 10))
+
+        def run_sweep():
+            from Lcapy.mna_solver import parse_value
+            start = parse_value(fields['start'].get().strip())
+            stop = parse_value(fields['stop'].get().strip())
+            t_text = fields['t'].get().strip()
+            t = parse_value(t_text) if t_text else None
+            try:
+                points = int(fields['points'].get())
+            except ValueError:
+                points = None
+            if start is None or stop is None or not points or (t_text and t is None):
+                status.configure(text="Enter numeric values (e.g. 1k, 4.7u).", text_color="#E74C3C")
+                return
+            status.configure(text="Solving...", text_color="gray")
+            comp, scale = comp_var.get(), scale_var.get()
+
+            def task():
+                try:
+                    from Lcapy.sweep import parametric_sweep, sweep_points
+                    values = sweep_points(start, stop, points, scale)
+                    result = parametric_sweep(netlist_str, {comp: values}, t=t)
+                    self.after(0, lambda: self.show_sweep_plot(plot_frame, status, comp, scale, result))
+                except Exception as e:
+                    message = f"Sweep failed: {e}"
+                    self.after(0, lambda: status.configure(text=message, text_color="#E74C3C"))
+
+            threading.Thread(target=task, daemon=True).start()
+
+        ctk.CTkButton(controls, text="Run", width=70, command=run_sweep).pack(side="right", padx=10)
+
+    def show_sweep_plot(self, plot_frame, status, comp, scale, result):
+        import matplotlib
+        matplotlib.use("TkAgg")
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+        for widget in plot_frame.winfo_children():
+            widget.destroy()
+        fig = Figure(figsize=(7, 5), dpi=100)
+        ax = fig.add_subplot(111)
+        x = result['values'][comp]
+        for n, v in result['nodes'].items():
+            ax.plot(x, v, label=f"V({n})")
+        if scale == "log":
+            ax.set_xscale("log")
+        ax.set_xlabel(comp)
+        ax.set_ylabel("Voltage (V)")
+        ax.grid(True, which="both", alpha=0.3)
+        ax.legend(loc="best")
+
+        canvas = FigureCanvasTkAgg(fig, master=plot_frame)
+        canvas.draw()
+        canvas.get_tk_widget().pack(expand=True, fill="both")
+        status.configure(text=f"{len(x)} points, {len(result['nodes'])} nodes", text_color="gray")
+
     def clear_results(self):
         for widget in self.result_widgets:
             widget.destroy()
@@ -459,41 +690,29 @@ class CircuitApp(ctk.CTk):
             lbl.grid(row=0, column=idx, padx=5, pady=5, sticky="ew")
             self.result_widgets.append(lbl)
 
-    def populate_results(self, text, is_error=False):
+    def populate_results(self, result, is_error=False):
         self.clear_results()
         if is_error:
-            lbl = ctk.CTkLabel(self.result_scroll, text=text, text_color="#E74C3C", justify="left")
+            lbl = ctk.CTkLabel(self.result_scroll, text=result, text_color="#E74C3C", justify="left")
             lbl.grid(row=1, column=0, columnspan=3, sticky="w", padx=10, pady=5)
             self.result_widgets.append(lbl)
             return
 
-        lines = text.split('\n')
         row_idx = 1
-        for line in lines:
-            line = line.strip()
-            if not line: continue
-            if "Processing Netlist" in line: continue
-            if "=" not in line and ":" not in line:
-                if len(line.split()) >= 3: continue
-            
-            match = re.match(r"(.+?)\s*[=:]\s*(.+)", line)
-            if match:
-                param_name = match.group(1).strip()
-                raw_value = match.group(2).strip()
-                parts = raw_value.split(' ')
-                val_display = raw_value
-                unit_display = "-"
-                if len(parts) > 1 and parts[-1].isalpha():
-                    val_display = " ".join(parts[:-1])
-                    unit_display = parts[-1]
-                self.add_result_row_widget(row_idx, param_name, val_display, unit_display)
-                row_idx += 1
-            else:
-                if line.endswith(':'): 
-                    lbl = ctk.CTkLabel(self.result_scroll, text=line, font=("Arial", 12, "bold"), text_color="#3498DB")
-                    lbl.grid(row=row_idx, column=0, columnspan=3, sticky="w", pady=(10,2), padx=5)
-                    self.result_widgets.append(lbl)
+        sections = [(">> Time-Domain Analysis (t ≥ 0):", result.nodes), (">> Branch Currents (t ≥ 0):", result.branches)]
+        for title, quantities in sections:
+            lbl = ctk.CTkLabel(self.result_scroll, text=title, font=("Arial", 12, "bold"), text_color="#3498DB")
+            lbl.grid(row=row_idx, column=0, columnspan=3, sticky="w", pady=(10,2), padx=5)
+            self.result_widgets.append(lbl)
+            row_idx += 1
+            if quantities is result.nodes:
+                for warning in result.warnings:
+                    self.add_result_row_widget(row_idx, "Warning", warning.split(": ", 1)[-1], "-")
                     row_idx += 1
+            for q in quantities:
+                unit = "-" if q.error is not None else q.unit
+                self.add_result_row_widget(row_idx, q.label, q.value_text(), unit)
+                row_idx += 1
 
     def add_result_row_widget(self, row, param, val, unit):
         e_param = ctk.CTkEntry(self.result_scroll, width=120, font=("Arial", 13, "bold"))
@@ -517,6 +736,7 @@ class CircuitApp(ctk.CTk):
         return lbl_img
 
     def show_image(self, cv_img, label_widget):
+        cv_img = resolve_overlay(cv_img)
         if cv_img is None: return
         cv_img = cv2.cvtColor(cv_img, cv2.COLOR_BGR2RGB)
         im_pil = Image.fromarray(cv_img)
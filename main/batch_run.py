@@ -0,0 +1,77 @@
+import sys
+import os
+import argparse
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+project_root = os.path.dirname(current_dir)
+
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from pipeline.batch_runner import run_batch
+
+MODEL_PATH = os.path.join(project_root, 'yolo', 'weights', 'best.pt')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert circuit images to netlists without the GUI.")
+    parser.add_argument('inputs', nargs='+', help="Image files, directories, or .txt files listing image paths")
+    parser.add_argument('-o', '--output', default='batch_output', help="Directory for netlists and overlays")
+    parser.add_argument('--model', default=MODEL_PATH, help="Path to the YOLO weights")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="Number of worker processes")
+    parser.add_argument('--threads-per-worker', type=int, default=None, help="CPU threads per worker")
+    parser.add_argument('-b', '--batch-size', type=int, default=None,
+                        help="Images per YOLO inference call, default 1 (images per overlapped run with --overlap, default 8)")
+    parser.add_argument('--overlap', action='store_true',
+                        help="Detect the next image while the current one is in OCR, instead of batching YOLO")
+    parser.add_argument('--overlays', action='store_true', help="Also save the node analysis overlay images")
+    parser.add_argument('--cache-dir', default=None, help="Reuse detection/OCR results stored in this directory")
+    parser.add_argument('--timings', action='store_true', help="Write per-image stage timings as JSON")
+    parser.add_argument('--track-memory', action='store_true', help="Record traced peak memory per stage")
+    parser.add_argument('--profile', choices=['cprofile', 'pyinstrument'], default=None,
+                        help="Profile each image and save the report next to its timings")
+    parser.add_argument('--normalize-resolution', action='store_true',
+                        help="Extract nodes on a copy scaled to the component size (faster on large photos)")
+    parser.add_argument('--ocr-regions', action='store_true',
+                        help="Only OCR the areas around detected components instead of the whole page")
+    parser.add_argument('--analyze', action='store_true',
+                        help="Also solve each netlist with Lcapy and save <name>.analysis.json")
+    parser.add_argument('--analysis-workers', type=int, default=1, help="Processes solving netlists")
+    parser.add_argument('--analysis-timeout', type=float, default=30,
+                        help="Seconds one netlist may take before its partial result is saved")
+    parser.add_argument('--lang', default='en', help="OCR language")
+    args = parser.parse_args()
+
+    start = time.time()
+    done = 0
+    failed = 0
+    for summary in run_batch(args.inputs, args.output, args.model, workers=args.workers,
+                             save_overlays=args.overlays, lang=args.lang,
+                             threads_per_worker=args.threads_per_worker, batch_size=args.batch_size,
+                             cache_dir=args.cache_dir, save_timings=args.timings or bool(args.profile),
+                             track_memory=args.track_memory, profiler=args.profile,
+                             normalize_resolution=args.normalize_resolution, overlap=args.overlap,
+                             ocr_regions=args.ocr_regions, analyze=args.analyze,
+                             analysis_workers=args.analysis_workers, analysis_timeout=args.analysis_timeout):
+        done += 1
+        if summary['ok']:
+            analysis = f", analysis {summary['analysis']}" if 'analysis' in summary else ""
+            print(f"[{done}] {summary['image_path']} -> {summary['netlist_path']} ({summary['components']} components{analysis})")
+        else:
+            failed += 1
+            print(f"[{done}] {summary['image_path']} FAILED: {summary['error']}")
+
+    if done == 0:
+        print("No images found.")
+        sys.exit(1)
+
+    elapsed = time.time() - start
+    print(f"Processed {done} images in {elapsed:.1f}s ({failed} failed). Results in: {args.output}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import sys
+import os
+import argparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+project_root = os.path.dirname(current_dir)
+
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from yolo.yolo_user_function.onnx_detector import export_onnx
+
+MODEL_PATH = os.path.join(project_root, 'yolo', 'weights', 'best.pt')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the YOLO weights to ONNX for the onnxruntime backend.")
+    parser.add_argument('--model', default=MODEL_PATH, help="Path to the YOLO .pt weights")
+    parser.add_argument('--imgsz', type=int, default=640, help="Input size baked into the exported model")
+    parser.add_argument('--opset', type=int, default=None, help="ONNX opset version")
+    args = parser.parse_args()
+
+    onnx_path = export_onnx(args.model, imgsz=args.imgsz, opset=args.opset)
+    print(f"Exported: {onnx_path}")
+    print(f"Use it with: python main/batch_run.py <images> --model {onnx_path}")
+
+
+if __name__ == "__main__":
+    main()
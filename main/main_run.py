@@ -1,5 +1,6 @@
 import sys
 import os
+import multiprocessing
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 
@@ -13,5 +14,7 @@ print(f"Project Root added: {project_root}")
 from desktop_Application.gui import CircuitApp
 
 if __name__ == "__main__":
+    # Needed by the spawned analysis workers in a frozen build.
+    multiprocessing.freeze_support()
     app = CircuitApp()
     app.mainloop()
\ No newline at end of file
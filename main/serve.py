@@ -0,0 +1,60 @@
+import sys
+import os
+import argparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+project_root = os.path.dirname(current_dir)
+
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from pipeline.circuit_pipeline import CircuitPipeline
+from pipeline.server import InferenceService, make_server
+
+MODEL_PATH = os.path.join(project_root, 'yolo', 'weights', 'best.pt')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve circuit image -> netlist conversion on localhost.")
+    parser.add_argument('--port', type=int, default=8765, help="Port on 127.0.0.1")
+    parser.add_argument('--model', default=MODEL_PATH, help="Path to the YOLO weights (.pt or .onnx)")
+    parser.add_argument('-w', '--workers', type=int, default=1, help="Warm model copies serving requests")
+    parser.add_argument('--threads-per-worker', type=int, default=None, help="CPU threads per detector")
+    parser.add_argument('--queue-size', type=int, default=32, help="Requests allowed to wait before 503")
+    parser.add_argument('--max-batch', type=int, default=8, help="Most images per YOLO call")
+    parser.add_argument('--max-wait-ms', type=float, default=20,
+                        help="How long the first request of a batch waits for others")
+    parser.add_argument('--timeout', type=float, default=60, help="Per-request timeout in seconds")
+    parser.add_argument('--analysis-timeout', type=float, default=30,
+                        help="Seconds Lcapy may spend on one ?analyze=1 netlist before partial results are returned")
+    parser.add_argument('--normalize-resolution', action='store_true',
+                        help="Extract nodes on a copy scaled to the component size (faster on large photos)")
+    parser.add_argument('--ocr-regions', action='store_true',
+                        help="Only OCR the areas around detected components instead of the whole page")
+    parser.add_argument('--lang', default='en', help="OCR language")
+    args = parser.parse_args()
+
+    def make_pipeline():
+        return CircuitPipeline(args.model, lang=args.lang, load=False, detector_threads=args.threads_per_worker,
+                               normalize_resolution=args.normalize_resolution, ocr_regions=args.ocr_regions)
+
+    service = InferenceService(make_pipeline, workers=args.workers, queue_size=args.queue_size,
+                               max_batch=args.max_batch, max_wait_ms=args.max_wait_ms, timeout_s=args.timeout,
+                               analysis_timeout_s=args.analysis_timeout)
+    print(f"Loading {args.workers} model worker(s)...")
+    service.start()
+
+    server = make_server(service, port=args.port)
+    print(f"Listening on http://127.0.0.1:{args.port} (POST /netlist, GET /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import sys
+import os
+import argparse
+
+import cv2
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+project_root = os.path.dirname(current_dir)
+
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from pipeline.circuit_pipeline import CircuitPipeline
+from pipeline.stream import StreamProcessor, FrameGate, frame_source
+from open_cv.overlays import RENDER_LAZY, RENDER_NONE, resolve_overlay
+
+MODEL_PATH = os.path.join(project_root, 'yolo', 'weights', 'best.pt')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep a netlist up to date from a webcam or video of a circuit.")
+    parser.add_argument('source', help="Camera index (e.g. 0) or path to a video file")
+    parser.add_argument('--model', default=MODEL_PATH, help="Path to the YOLO weights (.pt or .onnx)")
+    parser.add_argument('--stride', type=int, default=1, help="Only look at every N-th frame")
+    parser.add_argument('--max-hamming', type=int, default=2, help="Frame hash bits that may change before re-running")
+    parser.add_argument('--diff-threshold', type=float, default=4.0,
+                        help="Mean thumbnail difference (0-255) that triggers a re-run")
+    parser.add_argument('--show', action='store_true', help="Show the node overlay in a window (q to quit)")
+    parser.add_argument('-o', '--output', default=None, help="Write the latest netlist to this file")
+    parser.add_argument('--lang', default='en', help="OCR language")
+    args = parser.parse_args()
+
+    source = int(args.source) if args.source.isdigit() else args.source
+    pipeline = CircuitPipeline(args.model, lang=args.lang)
+    gate = FrameGate(max_hamming=args.max_hamming, diff_threshold=args.diff_threshold)
+    stream = StreamProcessor(pipeline, gate=gate, render=RENDER_LAZY if args.show else RENDER_NONE)
+
+    last_netlist = None
+    try:
+        for result in stream.run(frame_source(source, stride=args.stride)):
+            if not result['skipped']:
+                ms = result['timings']['total_wall_s'] * 1000
+                print(f"[frame {result['frame_index']}] {len(result['components'])} components, "
+                      f"{result['reread']} re-read, {ms:.0f} ms")
+                if result['ocr_error']:
+                    print(f"[frame {result['frame_index']}] OCR failed, retrying: {result['ocr_error']}")
+
+            if result['netlist'] != last_netlist:
+                last_netlist = result['netlist']
+                print(last_netlist)
+                if args.output:
+                    with open(args.output, 'w', encoding='utf-8') as f:
+                        f.write(last_netlist)
+
+            if args.show:
+                schematic = resolve_overlay(result['schematic'])
+                if schematic is not None:
+                    cv2.imshow("Circuit stream", schematic)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.show:
+            cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,13 @@ import cv2
 import numpy as np
 import math
 import re
-from collections import Counter
+
+from open_cv.spatial_index import GridIndex
+from open_cv.overlays import RENDER_EAGER, make_overlay, draw_node_schematic
+from profiling.stage_timer import span
+
+# Component size (longest box side, px) the morphology constants were tuned for.
+REFERENCE_COMPONENT_SIZE = 80
 
 class CircuitProcessor:
     def __init__(self):
@@ -14,6 +20,66 @@ class CircuitProcessor:
             return int((box[0] + box[2]) / 2), int((box[1] + box[3]) / 2)
         return 0, 0
 
+    def get_centers(self, boxes):
+        try:
+            arr = np.asarray(boxes, dtype=float).reshape(len(boxes), -1)
+        except ValueError:
+            arr = None
+        if arr is None or arr.shape[1] != 4:
+            return np.array([self.get_center(b) for b in boxes], dtype=int).reshape(-1, 2)
+        cx = ((arr[:, 0] + arr[:, 2]) / 2).astype(int)
+        cy = ((arr[:, 1] + arr[:, 3]) / 2).astype(int)
+        return np.stack([cx, cy], axis=1)
+
+    def working_factor(self, boxes, reference=REFERENCE_COMPONENT_SIZE):
+        # Integer downscale that brings the median component near the reference size.
+        if not boxes:
+            return 1
+        arr = np.asarray(boxes, dtype=float).reshape(len(boxes), -1)
+        sizes = np.maximum(arr[:, 2] - arr[:, 0], arr[:, 3] - arr[:, 1])
+        return max(1, int(float(np.median(sizes)) // reference))
+
+    def downscale_binary(self, binary, factor):
+        # Max-pools factor x factor cells so a wire one pixel wide still sets
+        # its cell; strided maxima are much cheaper than cv2.resize(INTER_AREA).
+        h, w = binary.shape
+        cropped = binary[:h - h % factor, :w - w % factor]
+        rows = cropped[0::factor].copy()
+        for i in range(1, factor):
+            np.maximum(rows, cropped[i::factor], out=rows)
+        pooled = rows[:, 0::factor].copy()
+        for j in range(1, factor):
+            np.maximum(pooled, rows[:, j::factor], out=pooled)
+        return pooled
+
+    def node_incidence(self, labels_im, stats, boxes, margin=15, min_area=300):
+        # Sparse component x label matrix (CSR): 1 where a node large enough
+        # to be a wire enters the component's expanded box and touches at
+        # least two components.
+        from scipy import sparse
+
+        h_img, w_img = labels_im.shape
+        num_labels = len(stats)
+        # Background and specks are dropped per pixel before pairing.
+        wire = stats[:, cv2.CC_STAT_AREA] > min_area
+        wire[0] = False
+
+        codes = []
+        for i, (x1, y1, x2, y2) in enumerate(boxes):
+            roi = labels_im[max(0, y1-margin):min(h_img, y2+margin), max(0, x1-margin):min(w_img, x2+margin)].ravel()
+            codes.append(i * num_labels + roi[wire[roi]].astype(np.int64))
+        codes = np.concatenate(codes) if codes else np.zeros(0, dtype=np.int64)
+        # Wire pixels come in runs of one label; keeping run starts makes the
+        # single de-duplication pass over all (component, label) pairs cheap.
+        if len(codes):
+            codes = codes[np.concatenate(([True], codes[1:] != codes[:-1]))]
+        rows, cols = np.divmod(np.unique(codes), num_labels)
+
+        shared = np.bincount(cols, minlength=num_labels) >= 2
+        rows, cols = rows[shared[cols]], cols[shared[cols]]
+        return sparse.csr_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols)),
+                                 shape=(len(boxes), num_labels))
+
     def calculate_distance(self, p1, p2):
         return math.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
 
@@ -40,6 +106,55 @@ class CircuitProcessor:
             return 'a' in text
         return True
 
+    def format_matched_value(self, best_text):
+        val_clean = best_text
+        val_clean_lower = val_clean.lower()
+        if not any(x in val_clean_lower for x in ['t', '(', ')']):
+            val_clean = val_clean_lower.replace("ohm", "").replace("f", "").replace("h", "").replace("v", "")
+
+        if val_clean.strip():
+            return val_clean.upper() if len(val_clean) < 4 else val_clean
+        return None
+
+    def match_values(self, processed_comps, text_data, max_dist=500):
+        if not processed_comps or not text_data:
+            return
+
+        texts = [item['text'] for item in text_data]
+        comp_centers = self.get_centers([c['box'] for c in processed_comps])
+        text_centers = self.get_centers([item['box'] for item in text_data])
+
+        diff = comp_centers[:, None, :] - text_centers[None, :, :]
+        dist = np.sqrt((diff ** 2).sum(axis=2))
+
+        has_digit = np.array([any(ch.isdigit() for ch in t) for t in texts])
+        candidates = (dist < max_dist) & has_digit[None, :]
+
+        comp_types = [c['type'] for c in processed_comps]
+        type_rows = {t: np.array([self.is_unit_compatible(t, txt) for txt in texts]) for t in set(comp_types)}
+        unit_mask = np.stack([type_rows[t] for t in comp_types])
+
+        # Unit-compatible texts win over bare numbers; argmin keeps the first text on ties.
+        unit_dist = np.where(candidates & unit_mask, dist, np.inf)
+        number_dist = np.where(candidates & ~unit_mask, dist, np.inf)
+        rows = np.arange(len(processed_comps))
+        best_unit = unit_dist.argmin(axis=1)
+        best_number = number_dist.argmin(axis=1)
+        has_unit = np.isfinite(unit_dist[rows, best_unit])
+        has_number = np.isfinite(number_dist[rows, best_number])
+
+        for i, comp in enumerate(processed_comps):
+            if has_unit[i]:
+                best_text = texts[best_unit[i]]
+            elif has_number[i]:
+                best_text = texts[best_number[i]]
+            else:
+                continue
+
+            value = self.format_matched_value(best_text)
+            if value:
+                comp['matched_value'] = value
+
     def merge_text_and_symbols(self, text_data, yolo_components, threshold=80):
         if not text_data:
             return text_data, yolo_components
@@ -56,20 +171,15 @@ class CircuitProcessor:
             else:
                 main_components.append(comp)
         
+        symbol_index = GridIndex([self.get_center(sym['box']) for sym in symbols], threshold)
+
         for item in text_data:
             txt_center = self.get_center(item['box'])
             current_text = self.clean_text_value(item['text'])
-            closest_sym = None
-            min_dist = float('inf')
-
-            for sym in symbols:
-                sym_center = self.get_center(sym['box'])
-                dist = self.calculate_distance(txt_center, sym_center)
-                if dist < min_dist:
-                    min_dist = dist
-                    closest_sym = sym
+            closest_idx, _ = symbol_index.nearest(txt_center, threshold)
 
-            if closest_sym and min_dist < threshold:
+            if closest_idx is not None:
+                closest_sym = symbols[closest_idx]
                 sym_name = closest_sym.get('name', '').lower()
                 unit_suffix = ""
                 if 'micro' in sym_name: unit_suffix = "u"
@@ -82,11 +192,32 @@ class CircuitProcessor:
             
         return text_data, main_components
 
-    def process_nodes(self, original_image, components, text_data=None):
-        text_data, main_components = self.merge_text_and_symbols(text_data, components)
+    def mask_boxes(self, image, components, text_data=None):
+        for comp in components:
+            box = comp.get("box", [])
+            if len(box) == 4:
+                x1, y1, x2, y2 = map(int, box)
+                cv2.rectangle(image, (x1, y1), (x2, y2), (255, 255, 255), -1)
+
+        if text_data:
+            for item in text_data:
+                box = item['box']
+                if len(box) == 4 and isinstance(box[0], (int, float)):
+                    x1, y1, x2, y2 = map(int, box)
+                    cv2.rectangle(image, (x1, y1), (x2, y2), (255, 255, 255), -1)
+        return image
+
+    def process_nodes(self, original_image, components, text_data=None, render=RENDER_EAGER, timer=None,
+                      normalize_resolution=False, base_image=None):
+        # original_image is only read. base_image, if given, returns the
+        # unmasked image for the overlays (the caller may have masked
+        # original_image in place).
+        if base_image is None:
+            base_image = lambda: original_image
+
+        with span(timer, 'merge_text_and_symbols'):
+            text_data, main_components = self.merge_text_and_symbols(text_data, components)
 
-        img_clean = original_image.copy() 
-        final_schematic = original_image.copy() 
         processed_comps = []
         
         def get_spice_info(label):
@@ -114,120 +245,64 @@ class CircuitProcessor:
             })
 
         if text_data:
-            for comp in processed_comps:
-                cx, cy = self.get_center(comp['box'])
-                
-                unit_matched_candidates = []
-                number_only_candidates = []
-                
-                for item in text_data:
-                    tx, ty = self.get_center(item['box'])
-                    dist = math.sqrt((cx - tx)**2 + (cy - ty)**2)
-                    text_val = item['text']
-                    
-                    if dist < 500:
-                        if not any(char.isdigit() for char in text_val):
-                            continue
-                            
-                        if self.is_unit_compatible(comp['type'], text_val):
-                            unit_matched_candidates.append({'text': text_val, 'dist': dist})
-                        else:
-                            number_only_candidates.append({'text': text_val, 'dist': dist})
-                
-                best_text = None
-                
-                if unit_matched_candidates:
-                    unit_matched_candidates.sort(key=lambda x: x['dist'])
-                    best_text = unit_matched_candidates[0]['text']
-                elif number_only_candidates:
-                    number_only_candidates.sort(key=lambda x: x['dist'])
-                    best_text = number_only_candidates[0]['text']
-
-                if best_text:
-                    val_clean = best_text
-                    val_clean_lower = val_clean.lower()
-                    if not any(x in val_clean_lower for x in ['t', '(', ')']):
-                         val_clean = val_clean_lower.replace("ohm", "").replace("f", "").replace("h", "").replace("v", "")
-                    
-                    if val_clean.strip():
-                        comp['matched_value'] = val_clean.upper() if len(val_clean) < 4 else val_clean
+            with span(timer, 'match_values'):
+                self.match_values(processed_comps, text_data)
 
-        for comp in components:
-            box = comp.get("box", [])
-            if len(box) == 4:
-                x1, y1, x2, y2 = map(int, box)
-                cv2.rectangle(img_clean, (x1, y1), (x2, y2), (255, 255, 255), -1)
+        # Boxes are masked on the single-channel gray image, which is all the
+        # node stage needs; the BGR 'clean' image is only built as an overlay.
+        with span(timer, 'mask'):
+            gray = cv2.cvtColor(original_image, cv2.COLOR_BGR2GRAY)
+            self.mask_boxes(gray, components, text_data)
+            img_clean = make_overlay(render, lambda: self.mask_boxes(base_image().copy(), components, text_data))
 
-        if text_data:
-            for item in text_data:
-                box = item['box']
-                if len(box) == 4 and isinstance(box[0], (int, float)):
-                    x1, y1, x2, y2 = map(int, box)
-                    cv2.rectangle(img_clean, (x1, y1), (x2, y2), (255, 255, 255), -1)
-
-        gray = cv2.cvtColor(img_clean, cv2.COLOR_BGR2GRAY)
-        _, binary = cv2.threshold(gray, 200, 255, cv2.THRESH_BINARY_INV)
-        mask_dilated = cv2.dilate(binary, np.ones((5,5), np.uint8), iterations=3)
-        num_labels, labels_im, stats, centroids = cv2.connectedComponentsWithStats(mask_dilated, connectivity=8)
-
-        margin = 15
-        all_detected_nodes = []
-        for c in processed_comps:
-            x1, y1, x2, y2 = c["box"]
-            h_img, w_img = labels_im.shape
-            roi = labels_im[max(0, y1-margin):min(h_img, y2+margin), max(0, x1-margin):min(w_img, x2+margin)]
-            unique_ids = np.unique(roi)
-            for nid in unique_ids:
-                if nid == 0: continue 
-                if stats[nid, cv2.CC_STAT_AREA] > 300:
-                    c["raw_nodes"].append(nid)
-                    all_detected_nodes.append(nid)
-
-        node_counts = Counter(all_detected_nodes)
-        
-        active_node_ids = set()
-        for c in processed_comps:
-            valid_nodes = [n for n in c["raw_nodes"] if node_counts[n] >= 2] 
-            c["raw_nodes"] = valid_nodes
-            for n in valid_nodes: active_node_ids.add(n)
-        
-        sorted_node_ids = sorted(list(active_node_ids))
-        
-        id_to_name = {}
-        for i, nid in enumerate(sorted_node_ids):
-            if i == len(sorted_node_ids) - 1:
-                id_to_name[nid] = '0' 
-            else:
-                id_to_name[nid] = str(i+1)
+        # Morphology and labeling run on a copy shrunk so components have a
+        # fixed size; the pixel constants below then mean the same at any resolution.
+        factor = self.working_factor([c['box'] for c in processed_comps]) if normalize_resolution else 1
 
-        if len(active_node_ids) > 0:
-            colors = np.zeros((num_labels, 3), dtype=np.uint8)
-            
-            for nid in active_node_ids:
-                colors[nid] = np.random.randint(0, 255, size=3)
-            
-            colored_nodes = colors[labels_im]
-            final_schematic = cv2.addWeighted(final_schematic, 0.7, colored_nodes, 0.3, 0)
-
-        for nid in active_node_ids:
-            cx, cy = int(centroids[nid][0]), int(centroids[nid][1])
-            cv2.circle(final_schematic, (cx, cy), 15, (0, 0, 255), -1) 
-            node_name_show = "Gnd" if id_to_name[nid] == '0' else id_to_name[nid]
-            cv2.putText(final_schematic, node_name_show, (cx-7, cy+7), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-
-        for c in processed_comps:
-            x1, y1, x2, y2 = c["box"]
-            val_show = c['matched_value'] if c['matched_value'] else "?"
-            display = f"{c['name']} ({val_show})"
-            cv2.rectangle(final_schematic, (x1, y1), (x2, y2), (0, 255, 0), 2)
-            cv2.putText(final_schematic, display, (x1, y1-5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 100, 0), 2)
-
-        netlist_str = "# Auto-Generated Netlist\n"
-        for c in processed_comps:
-            valid_nodes = c["raw_nodes"]
-            node1 = id_to_name.get(valid_nodes[0], "?") if len(valid_nodes) > 0 else "?"
-            node2 = id_to_name.get(valid_nodes[1], "0") if len(valid_nodes) > 1 else "0"
-            value = c['matched_value'] if c['matched_value'] else "1k"
-            netlist_str += f"{c['name']} {node1} {node2} {value}\n"
-
-        return img_clean, final_schematic, netlist_str
\ No newline at end of file
+        with span(timer, 'threshold_dilate'):
+            _, binary = cv2.threshold(gray, 200, 255, cv2.THRESH_BINARY_INV)
+            if factor > 1:
+                binary = self.downscale_binary(binary, factor)
+            mask_dilated = cv2.dilate(binary, np.ones((5,5), np.uint8), iterations=3)
+
+        with span(timer, 'connected_components'):
+            num_labels, labels_im, stats, centroids = cv2.connectedComponentsWithStats(mask_dilated, connectivity=8)
+
+        with span(timer, 'node_mapping'):
+            boxes = [[v // factor for v in c["box"]] for c in processed_comps]
+            incidence = self.node_incidence(labels_im, stats, boxes)
+
+            for i, c in enumerate(processed_comps):
+                c["raw_nodes"] = incidence.indices[incidence.indptr[i]:incidence.indptr[i + 1]].tolist()
+            active_node_ids = set(np.unique(incidence.indices).tolist())
+            sorted_node_ids = sorted(active_node_ids)
+
+            id_to_name = {}
+            for i, nid in enumerate(sorted_node_ids):
+                if i == len(sorted_node_ids) - 1:
+                    id_to_name[nid] = '0' 
+                else:
+                    id_to_name[nid] = str(i+1)
+
+        def render_schematic():
+            node_labels, node_centroids = labels_im, centroids
+            if factor > 1:
+                h_full, w_full = original_image.shape[:2]
+                node_labels = cv2.resize(labels_im, (w_full, h_full), interpolation=cv2.INTER_NEAREST)
+                node_centroids = centroids * factor
+            return draw_node_schematic(base_image(), processed_comps, node_labels, node_centroids,
+                                       active_node_ids, id_to_name)
+
+        with span(timer, 'overlay'):
+            final_schematic = make_overlay(render, render_schematic)
+
+        with span(timer, 'netlist'):
+            netlist_str = "# Auto-Generated Netlist\n"
+            for c in processed_comps:
+                valid_nodes = c["raw_nodes"]
+                node1 = id_to_name.get(valid_nodes[0], "?") if len(valid_nodes) > 0 else "?"
+                node2 = id_to_name.get(valid_nodes[1], "0") if len(valid_nodes) > 1 else "0"
+                value = c['matched_value'] if c['matched_value'] else "1k"
+                netlist_str += f"{c['name']} {node1} {node2} {value}\n"
+
+        return img_clean, final_schematic, netlist_str
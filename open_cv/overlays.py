@@ -0,0 +1,86 @@
+import cv2
+import numpy as np
+
+RENDER_NONE = 'none'
+RENDER_LAZY = 'lazy'
+RENDER_EAGER = 'eager'
+RENDER_MODES = (RENDER_NONE, RENDER_LAZY, RENDER_EAGER)
+
+
+class LazyOverlay:
+    # Holds what is needed to draw an overlay and only draws it on first use.
+    def __init__(self, render_fn):
+        self._render_fn = render_fn
+        self._image = None
+
+    def render(self):
+        if self._image is None:
+            self._image = self._render_fn()
+            self._render_fn = None
+        return self._image
+
+
+def make_overlay(render, render_fn):
+    if render == RENDER_NONE:
+        return None
+    if render == RENDER_LAZY:
+        return LazyOverlay(render_fn)
+    if render == RENDER_EAGER:
+        return render_fn()
+    raise ValueError(f"Unknown render mode: {render} (expected one of {RENDER_MODES})")
+
+
+def resolve_overlay(overlay):
+    if isinstance(overlay, LazyOverlay):
+        return overlay.render()
+    return overlay
+
+
+def draw_detections(image, components):
+    vis = image.copy()
+    for comp in components:
+        x1, y1, x2, y2 = map(int, comp['box'])
+        label = comp.get('name', '')
+        if comp.get('conf') is not None:
+            label = f"{label} {comp['conf']:.2f}"
+        cv2.rectangle(vis, (x1, y1), (x2, y2), (255, 128, 0), 2)
+        cv2.putText(vis, label, (x1, y1-5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 128, 0), 2)
+    return vis
+
+
+def draw_ocr(image, ocr_data):
+    vis = image.copy()
+    for item in ocr_data:
+        x1, y1, x2, y2 = item['box']
+        cv2.rectangle(vis, (x1, y1), (x2, y2), (255, 0, 0), 2)
+        cv2.putText(vis, item['text'], (x1, y1-5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
+    return vis
+
+
+def draw_node_schematic(image, processed_comps, labels_im, centroids, active_node_ids, id_to_name):
+    if len(active_node_ids) > 0:
+        num_labels = len(centroids)
+        colors = np.zeros((num_labels, 3), dtype=np.uint8)
+
+        for nid in active_node_ids:
+            colors[nid] = np.random.randint(0, 255, size=3)
+
+        colored_nodes = colors[labels_im]
+        final_schematic = cv2.addWeighted(image, 0.7, colored_nodes, 0.3, 0)
+    else:
+        final_schematic = image.copy()
+
+    for nid in active_node_ids:
+        cx, cy = int(centroids[nid][0]), int(centroids[nid][1])
+        cv2.circle(final_schematic, (cx, cy), 15, (0, 0, 255), -1)
+        node_name_show = "Gnd" if id_to_name[nid] == '0' else id_to_name[nid]
+        cv2.putText(final_schematic, node_name_show, (cx-7, cy+7), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+
+    for c in processed_comps:
+        x1, y1, x2, y2 = c["box"]
+        val_show = c['matched_value'] if c['matched_value'] else "?"
+        display = f"{c['name']} ({val_show})"
+        cv2.rectangle(final_schematic, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        cv2.putText(final_schematic, display, (x1, y1-5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 100, 0), 2)
+
+    return final_schematic
@@ -0,0 +1,55 @@
+import math
+from collections import defaultdict
+
+import numpy as np
+
+
+class GridIndex:
+    # Uniform grid hash over 2D points. With the cell size set to the usual
+    # query radius, each query only visits the 3x3 block of cells around it.
+    def __init__(self, points, cell_size):
+        self.points = np.asarray(points, dtype=float).reshape(-1, 2)
+        self.cell_size = max(float(cell_size), 1.0)
+        self.cells = defaultdict(list)
+
+        keys = np.floor(self.points / self.cell_size).astype(int)
+        for i, (gx, gy) in enumerate(keys.tolist()):
+            self.cells[(gx, gy)].append(i)
+
+    def __len__(self):
+        return len(self.points)
+
+    def _candidates(self, point, radius):
+        x, y = point
+        gx0 = math.floor((x - radius) / self.cell_size)
+        gx1 = math.floor((x + radius) / self.cell_size)
+        gy0 = math.floor((y - radius) / self.cell_size)
+        gy1 = math.floor((y + radius) / self.cell_size)
+
+        found = []
+        for gx in range(gx0, gx1 + 1):
+            for gy in range(gy0, gy1 + 1):
+                found.extend(self.cells.get((gx, gy), ()))
+        found.sort()
+        return found
+
+    def _distance(self, point, i):
+        px, py = self.points[i]
+        return math.sqrt((point[0] - px)**2 + (point[1] - py)**2)
+
+    def query_radius(self, point, radius):
+        # Indices (ascending) of all points strictly closer than radius.
+        return [i for i in self._candidates(point, radius) if self._distance(point, i) < radius]
+
+    def nearest(self, point, max_dist):
+        # Closest point strictly within max_dist; ties go to the lowest index.
+        best = None
+        best_dist = float('inf')
+        for i in self._candidates(point, max_dist):
+            dist = self._distance(point, i)
+            if dist < best_dist:
+                best_dist = dist
+                best = i
+        if best is None or best_dist >= max_dist:
+            return None, float('inf')
+        return best, best_dist
@@ -0,0 +1,246 @@
+import os
+import json
+import time
+import multiprocessing as mp
+from collections import deque
+
+import cv2
+
+from open_cv.overlays import RENDER_LAZY, RENDER_NONE, resolve_overlay
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff')
+
+_worker_pipeline = None
+
+
+def collect_images(inputs):
+    images = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    images.append(os.path.join(path, name))
+        elif path.lower().endswith('.txt'):
+            with open(path, encoding='utf-8') as f:
+                images.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+        else:
+            images.append(path)
+    return images
+
+
+def make_output_stems(images):
+    stems = []
+    seen = {}
+    for path in images:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        if stem in seen:
+            seen[stem] += 1
+            stem = f"{stem}_{seen[stem]}"
+        else:
+            seen[stem] = 1
+        stems.append(stem)
+    return stems
+
+
+def _init_worker(model_path, lang, threads_per_worker, cache_dir, track_memory, profiler, normalize_resolution,
+                 ocr_regions):
+    global _worker_pipeline
+    if threads_per_worker:
+        os.environ['OMP_NUM_THREADS'] = str(threads_per_worker)
+        cv2.setNumThreads(threads_per_worker)
+
+    # Heavy model imports happen here so the thread limits above apply to them.
+    from pipeline.circuit_pipeline import CircuitPipeline
+    from pipeline.inference_cache import InferenceCache
+    cache = InferenceCache(cache_dir) if cache_dir else None
+    _worker_pipeline = CircuitPipeline(model_path, lang=lang, cache=cache,
+                                       track_memory=track_memory, profiler=profiler,
+                                       normalize_resolution=normalize_resolution,
+                                       detector_threads=threads_per_worker, ocr_regions=ocr_regions)
+
+
+def _detect_chunk(image_paths, images, batch_size):
+    if len(image_paths) > 1:
+        try:
+            return [(comps, image_hash, None) for comps, image_hash in
+                    _worker_pipeline.detect_batch(image_paths, batch_size=batch_size, images=images)]
+        except Exception:
+            pass
+
+    # Single image, or a batch failed on one bad file: detect one by one.
+    detections = []
+    for image_path, img in zip(image_paths, images):
+        try:
+            _, components, image_hash = _worker_pipeline.detect(image_path, render=RENDER_NONE, image=img)
+            detections.append((components, image_hash, None))
+        except Exception as e:
+            detections.append((None, None, str(e)))
+    return detections
+
+
+def _process_job(job, img, components, image_hash, detect_s):
+    image_path, stem, output_dir, save_overlays, save_timings = job
+    try:
+        render = RENDER_LAZY if save_overlays else RENDER_NONE
+        result = _worker_pipeline.process_detections(image_path, components, render=render, image_hash=image_hash,
+                                                     image=img,
+                                                     base_image=_worker_pipeline.overlay_base(image_path, render))
+    except Exception as e:
+        return {'image_path': image_path, 'ok': False, 'error': str(e)}
+    return _write_outputs(job, result, detect_s)
+
+
+def _write_outputs(job, result, detect_s):
+    image_path, stem, output_dir, save_overlays, save_timings = job
+    netlist_path = os.path.join(output_dir, f"{stem}.net")
+    with open(netlist_path, 'w', encoding='utf-8') as f:
+        f.write(result['netlist'])
+
+    summary = {
+        'image_path': image_path,
+        'ok': True,
+        'netlist_path': netlist_path,
+        'components': len(result['components']),
+        'texts': len(result['ocr_data']),
+        'detect_s': detect_s,
+        'stages_s': {s['name']: round(s['wall_s'], 4) for s in result['timings']['stages']},
+    }
+
+    if save_timings:
+        timings_path = os.path.join(output_dir, f"{stem}.timings.json")
+        with open(timings_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(result['timings'], detect_s=detect_s), f, indent=2)
+        if result.get('profile'):
+            with open(os.path.join(output_dir, f"{stem}.profile.txt"), 'w', encoding='utf-8') as f:
+                f.write(result['profile'])
+
+    if save_overlays:
+        overlay_path = os.path.join(output_dir, f"{stem}_schematic.png")
+        cv2.imwrite(overlay_path, resolve_overlay(result['schematic']))
+        summary['overlay_path'] = overlay_path
+
+    return summary
+
+
+def _process_chunk(jobs):
+    summaries = []
+    decoded = []
+    start = time.perf_counter()
+    # Each image is decoded once and the array is shared by YOLO, OCR and
+    # node extraction.
+    for job in jobs:
+        img = cv2.imread(job[0])
+        if img is None:
+            summaries.append({'image_path': job[0], 'ok': False, 'error': f"Could not read image: {job[0]}"})
+        else:
+            decoded.append((job, img))
+    if not decoded:
+        return summaries
+
+    image_paths = [job[0] for job, _ in decoded]
+    images = [img for _, img in decoded]
+    detections = _detect_chunk(image_paths, images, len(image_paths))
+    # Batched detection is shared, so each image is charged an equal slice.
+    detect_s = round((time.perf_counter() - start) / len(decoded), 4)
+
+    del images
+    for i, (components, image_hash, error) in enumerate(detections):
+        job, img = decoded[i]
+        # Release each buffer once its image is done.
+        decoded[i] = None
+        if error is not None:
+            summaries.append({'image_path': job[0], 'ok': False, 'error': error})
+        else:
+            summaries.append(_process_job(job, img, components, image_hash, detect_s))
+    return summaries
+
+
+def _process_chunk_overlapped(jobs):
+    # Detection of image N+1 runs while image N is in OCR/node extraction.
+    render = RENDER_LAZY if jobs[0][3] else RENDER_NONE
+    summaries = []
+    stream = _worker_pipeline.process_stream([job[0] for job in jobs], render=render)
+    for job, (image_path, result, error) in zip(jobs, stream):
+        if error is not None:
+            summaries.append({'image_path': image_path, 'ok': False, 'error': str(error)})
+            continue
+        totals = {s['name']: s['wall_s'] for s in result['timings']['stages']}
+        detect_s = round(totals.get('decode', 0.0) + totals.get('detect', 0.0), 4)
+        summaries.append(_write_outputs(job, result, detect_s))
+    return summaries
+
+
+def _write_analysis(summary, job):
+    # Called once the job has finished, whatever its status.
+    analysis_path = os.path.splitext(summary['netlist_path'])[0] + ".analysis.json"
+    with open(analysis_path, 'w', encoding='utf-8') as f:
+        json.dump(job.to_dict(), f, indent=2)
+    summary['analysis'] = job.status
+    summary['analysis_path'] = analysis_path
+    return summary
+
+
+def run_batch(inputs, output_dir, model_path, workers=None, save_overlays=False,
+              lang='en', threads_per_worker=None, batch_size=None, cache_dir=None,
+              save_timings=False, track_memory=False, profiler=None, normalize_resolution=False,
+              overlap=False, ocr_regions=False, analyze=False, analysis_workers=1, analysis_timeout=None):
+    images = collect_images(inputs)
+    if not images:
+        return
+
+    os.makedirs(output_dir, exist_ok=True)
+    stems = make_output_stems(images)
+    jobs = [(path, stem, output_dir, save_overlays, save_timings) for path, stem in zip(images, stems)]
+    if batch_size is None:
+        # Overlapping needs several images per chunk to have anything to overlap.
+        batch_size = 8 if overlap else 1
+    batch_size = max(1, batch_size)
+    chunks = [jobs[i:i + batch_size] for i in range(0, len(jobs), batch_size)]
+
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 2) // 2)
+    workers = min(workers, len(chunks))
+
+    analysis_pool = None
+    if analyze:
+        # Netlists are analyzed while later images are still being detected;
+        # one that Lcapy cannot finish only costs its own time budget.
+        from Lcapy.analysis_pool import AnalysisPool, DEFAULT_TIMEOUT_S
+        analysis_pool = AnalysisPool(workers=analysis_workers, timeout_s=analysis_timeout or DEFAULT_TIMEOUT_S)
+        analysis_pool.start()
+    analyzing = deque()
+
+    summary_path = os.path.join(output_dir, 'summary.jsonl')
+    # spawn keeps torch/paddle state out of forked children.
+    ctx = mp.get_context('spawn')
+    try:
+        with ctx.Pool(processes=workers, initializer=_init_worker,
+                      initargs=(model_path, lang, threads_per_worker, cache_dir, track_memory, profiler,
+                                normalize_resolution, ocr_regions)) as pool, \
+                open(summary_path, 'w', encoding='utf-8') as summary_file:
+            finished = []
+            for summaries in pool.imap_unordered(_process_chunk_overlapped if overlap else _process_chunk, chunks):
+                for summary in summaries:
+                    if analysis_pool is not None and summary['ok']:
+                        with open(summary['netlist_path'], encoding='utf-8') as f:
+                            analyzing.append((summary, analysis_pool.submit(f.read())))
+                    else:
+                        finished.append(summary)
+                while analyzing and analyzing[0][1].done():
+                    finished.append(_write_analysis(*analyzing.popleft()))
+
+                for summary in finished:
+                    summary_file.write(json.dumps(summary) + "\n")
+                    yield summary
+                finished = []
+                summary_file.flush()
+
+            while analyzing:
+                summary, job = analyzing.popleft()
+                job.wait()
+                summary_file.write(json.dumps(_write_analysis(summary, job)) + "\n")
+                summary_file.flush()
+                yield summary
+    finally:
+        if analysis_pool is not None:
+            analysis_pool.close()
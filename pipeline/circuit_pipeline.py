@@ -0,0 +1,389 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from open_cv.circuit_logic import CircuitProcessor
+from open_cv.overlays import RENDER_EAGER, RENDER_NONE, LazyOverlay, make_overlay, draw_detections, draw_ocr
+from pipeline.inference_cache import hash_file
+from profiling.stage_timer import StageTimer, span
+
+WARM_UP_STAGES = ('detector', 'ocr')
+
+
+class CircuitPipeline:
+    def __init__(self, model_path, lang='en', cache=None, track_memory=False, profiler=None,
+                 normalize_resolution=False, concurrent_ocr=False, load=True, detector_threads=None,
+                 ocr_regions=False):
+        # With load=False the models are loaded on first use or by warm_up(),
+        # and importing this module does not pull in ultralytics/paddleocr.
+        self.model_path = model_path
+        self.detector_threads = detector_threads
+        self.detector = None
+        self.ocr = None
+        self.detector_fingerprint = None
+        self.processor = CircuitProcessor()
+        self.lang = lang
+        self.cache = cache
+        self.track_memory = track_memory
+        self.profiler = profiler
+        self.normalize_resolution = normalize_resolution
+        # Region OCR needs the component boxes, so it cannot overlap YOLO.
+        self.ocr_regions = ocr_regions
+        self.concurrent_ocr = concurrent_ocr and not ocr_regions
+        self._executor = None
+        self._detector_lock = threading.Lock()
+        self._ocr_lock = threading.Lock()
+
+        if load:
+            self.load_detector()
+            self.load_ocr()
+
+    def load_detector(self):
+        with self._detector_lock:
+            if self.detector is None:
+                # Exported .onnx weights run on onnxruntime; anything else on Ultralytics.
+                if self.model_path.lower().endswith('.onnx'):
+                    from yolo.yolo_user_function.onnx_detector import OnnxYoloDetector
+                    detector = OnnxYoloDetector(self.model_path, intra_op_threads=self.detector_threads)
+                else:
+                    from yolo.yolo_user_function.detector import YoloDetector
+                    detector = YoloDetector(self.model_path)
+                # Cached entries are only valid for the same weights and thresholds.
+                weights_hash = hash_file(self.model_path) if os.path.isfile(self.model_path) else self.model_path
+                self.detector_fingerprint = f"{weights_hash}|conf={detector.conf}|iou={detector.iou}"
+                self.detector = detector
+        return self.detector
+
+    def load_ocr(self):
+        with self._ocr_lock:
+            if self.ocr is None:
+                from OCR.ocr_engine import CircuitOCR
+                self.ocr = CircuitOCR(lang=self.lang)
+        return self.ocr
+
+    def warm_up(self, callback=None):
+        # Loads both models and runs one dummy inference through each, so the
+        # first real image does not pay for lazy initialisation.
+        # callback(stage, error) is called as each stage finishes.
+        dummy = np.full((320, 320, 3), 255, dtype=np.uint8)
+        cv2.putText(dummy, "10k", (100, 170), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 0), 3)
+
+        errors = {}
+        for stage in WARM_UP_STAGES:
+            try:
+                if stage == 'detector':
+                    self.load_detector().detect(dummy, render=RENDER_NONE)
+                else:
+                    self.load_ocr().ocr.ocr(dummy, cls=True)
+                errors[stage] = None
+            except Exception as e:
+                errors[stage] = e
+            if callback is not None:
+                callback(stage, errors[stage])
+        return errors
+
+    def detection_key(self, image_hash):
+        return self.cache.make_key('detect', image_hash, self.detector_fingerprint)
+
+    def ocr_key(self, image_hash):
+        mode = 'regions' if self.ocr_regions else 'page'
+        return self.cache.make_key('ocr', image_hash, self.detector_fingerprint, self.lang, mode)
+
+    def full_ocr_key(self, image_hash):
+        # Unmasked OCR does not depend on the detector.
+        return self.cache.make_key('ocr_full', image_hash, self.lang)
+
+    def executor(self):
+        # One background thread: YOLO and PaddleOCR both release the GIL in
+        # native code, so a second stage can overlap the first.
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='circuit-pipeline')
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def format_ocr_result(self, raw_ocr):
+        formatted_ocr = []
+        if raw_ocr and raw_ocr[0]:
+            for line in raw_ocr[0]:
+                pts = line[0]
+                text = line[1][0]
+                xs, ys = [p[0] for p in pts], [p[1] for p in pts]
+                x1, y1, x2, y2 = int(min(xs)), int(min(ys)), int(max(xs)), int(max(ys))
+                formatted_ocr.append({'text': text, 'box': [x1, y1, x2, y2], 'conf': float(line[1][1])})
+        return formatted_ocr
+
+    def new_timer(self):
+        return StageTimer(track_memory=self.track_memory, profiler=self.profiler)
+
+    def overlay_base(self, image_path, render):
+        # Eager overlays are drawn before any masking, so they use the decoded
+        # image itself (None here). Otherwise the decoded buffer is masked in
+        # place and overlays re-read the file once, on first use.
+        if render == RENDER_EAGER or not image_path:
+            return None
+        return LazyOverlay(lambda: cv2.imread(image_path)).render
+
+    def decode(self, image_path, timer=None):
+        with span(timer, 'decode'):
+            img = cv2.imread(image_path)
+        if img is None:
+            raise ValueError(f"Could not read image: {image_path}")
+        return img
+
+    def run_ocr(self, img, components, image_hash=None, timer=None, in_place=False):
+        self.load_detector()
+        self.load_ocr()
+        if self.cache is not None and image_hash:
+            cached = self.cache.get(self.ocr_key(image_hash))
+            if cached is not None:
+                return cached
+
+        with span(timer, 'ocr_mask'):
+            img_for_ocr = img if in_place else img.copy()
+            for comp in components:
+                if 'box' in comp:
+                    x1, y1, x2, y2 = map(int, comp['box'])
+                    cv2.rectangle(img_for_ocr, (x1, y1), (x2, y2), (255, 255, 255), -1)
+
+        try:
+            with span(timer, 'ocr'):
+                if self.ocr_regions:
+                    full_ocr = self.ocr.ocr_regions(img_for_ocr, components)
+                else:
+                    full_ocr = self.ocr.ocr.ocr(img_for_ocr, cls=True)
+        except:
+            # Failed OCR runs are not cached.
+            return []
+
+        formatted_ocr = self.format_ocr_result(full_ocr)
+        if self.cache is not None and image_hash:
+            self.cache.put(self.ocr_key(image_hash), formatted_ocr)
+        return formatted_ocr
+
+    def run_full_ocr(self, img, image_hash=None):
+        # OCR on the unmasked image, timed on its own StageTimer because it
+        # runs on the background thread.
+        timer = StageTimer()
+        self.load_ocr()
+        if self.cache is not None and image_hash:
+            cached = self.cache.get(self.full_ocr_key(image_hash))
+            if cached is not None:
+                return cached, timer
+
+        try:
+            with timer.span('ocr'):
+                full_ocr = self.ocr.ocr.ocr(img, cls=True)
+        except:
+            return [], timer
+
+        formatted_ocr = self.format_ocr_result(full_ocr)
+        if self.cache is not None and image_hash:
+            self.cache.put(self.full_ocr_key(image_hash), formatted_ocr)
+        return formatted_ocr, timer
+
+    def drop_masked_text(self, ocr_data, components):
+        # Same effect as painting the component boxes white before OCR: text
+        # centred inside a component box is discarded.
+        boxes = [comp['box'] for comp in components if len(comp.get('box', [])) == 4]
+        if not ocr_data or not boxes:
+            return ocr_data
+        boxes = np.asarray(boxes, dtype=float)
+        centers = np.array([[(t['box'][0] + t['box'][2]) / 2, (t['box'][1] + t['box'][3]) / 2] for t in ocr_data])
+        inside = ((centers[:, None, 0] >= boxes[None, :, 0]) & (centers[:, None, 0] <= boxes[None, :, 2]) &
+                  (centers[:, None, 1] >= boxes[None, :, 1]) & (centers[:, None, 1] <= boxes[None, :, 3]))
+        return [t for t, masked in zip(ocr_data, inside.any(axis=1)) if not masked]
+
+    def detect(self, image_path, render=RENDER_EAGER, image=None, base_image=None, image_hash=None):
+        # Returns (detect_plot, components, image_hash). On a cache hit the
+        # plot is None and gets redrawn from the cached boxes. An already
+        # decoded image is passed to YOLO instead of the path.
+        self.load_detector()
+        if self.cache is not None:
+            image_hash = image_hash or hash_file(image_path)
+            components = self.cache.get(self.detection_key(image_hash))
+            if components is not None:
+                return None, components, image_hash
+
+        source = image if image is not None else image_path
+        detect_plot, components = self.detector.detect(source, render=render, base_image=base_image)
+        if image_hash:
+            self.cache.put(self.detection_key(image_hash), components)
+        return detect_plot, components, image_hash
+
+    def detect_batch(self, image_paths, batch_size=8, images=None):
+        # Returns [(components, image_hash)]; only cache misses reach YOLO.
+        # images, if given, are the decoded arrays for image_paths.
+        self.load_detector()
+        image_paths = list(image_paths)
+        sources = list(images) if images is not None else image_paths
+        hashes = [hash_file(p) for p in image_paths] if self.cache is not None else [None] * len(image_paths)
+        detections = [None] * len(image_paths)
+
+        misses = []
+        for i, image_hash in enumerate(hashes):
+            if image_hash:
+                detections[i] = self.cache.get(self.detection_key(image_hash))
+            if detections[i] is None:
+                misses.append(i)
+
+        if misses:
+            fresh = self.detector.detect_batch([sources[i] for i in misses], batch_size=batch_size)
+            for i, components in zip(misses, fresh):
+                detections[i] = components
+                if hashes[i]:
+                    self.cache.put(self.detection_key(hashes[i]), components)
+
+        return list(zip(detections, hashes))
+
+    def finish_timer(self, result, timer):
+        timer.stop_profile()
+        result['timings'] = timer.to_dict()
+        if self.profiler:
+            result['profile'] = timer.profile_text()
+        timer.close()
+
+    def process(self, image_path, render=RENDER_EAGER):
+        timer = self.new_timer()
+        timer.start_profile()
+        try:
+            # Decoded once; YOLO, OCR and the node stage all share this buffer.
+            img = self.decode(image_path, timer=timer)
+            image_hash = hash_file(image_path) if self.cache is not None else None
+            ocr_data = None
+            if self.concurrent_ocr:
+                # OCR reads the unmasked buffer, so nothing may mask it in place.
+                base_image = None
+                ocr_future = self.executor().submit(self.run_full_ocr, img, image_hash)
+            else:
+                base_image = self.overlay_base(image_path, render)
+
+            with timer.span('detect'):
+                detect_plot, components, image_hash = self.detect(image_path, render=render, image=img,
+                                                                  base_image=base_image, image_hash=image_hash)
+
+            if self.concurrent_ocr:
+                with timer.span('ocr_wait'):
+                    full_ocr, ocr_timer = ocr_future.result()
+                timer.adopt(ocr_timer, 'concurrent')
+                with timer.span('ocr_filter'):
+                    ocr_data = self.drop_masked_text(full_ocr, components)
+
+            result = self.process_detections(image_path, components, detect_plot, render=render,
+                                             image_hash=image_hash, timer=timer, image=img,
+                                             base_image=base_image, ocr_data=ocr_data)
+        except Exception:
+            timer.close()
+            raise
+        self.finish_timer(result, timer)
+        return result
+
+    def _decode_and_detect(self, image_path, render):
+        timer = self.new_timer()
+        try:
+            img = self.decode(image_path, timer=timer)
+            base_image = self.overlay_base(image_path, render)
+            with timer.span('detect'):
+                detect_plot, components, image_hash = self.detect(image_path, render=render, image=img,
+                                                                  base_image=base_image)
+        except Exception:
+            timer.close()
+            raise
+        return timer, img, base_image, detect_plot, components, image_hash
+
+    def process_stream(self, image_paths, render=RENDER_NONE):
+        # Yields (image_path, result, error) in input order. Detection of the
+        # next image runs on the background thread while this one goes
+        # through OCR and node extraction.
+        image_paths = list(image_paths)
+        if not image_paths:
+            return
+
+        executor = self.executor()
+        pending = executor.submit(self._decode_and_detect, image_paths[0], render)
+        for i, image_path in enumerate(image_paths):
+            current = pending
+            if i + 1 < len(image_paths):
+                pending = executor.submit(self._decode_and_detect, image_paths[i + 1], render)
+
+            try:
+                timer, img, base_image, detect_plot, components, image_hash = current.result()
+            except Exception as e:
+                yield image_path, None, e
+                continue
+
+            try:
+                timer.start_profile()
+                result = self.process_detections(image_path, components, detect_plot, render=render,
+                                                 image_hash=image_hash, timer=timer, image=img,
+                                                 base_image=base_image)
+            except Exception as e:
+                timer.close()
+                yield image_path, None, e
+                continue
+            self.finish_timer(result, timer)
+            yield image_path, result, None
+
+    def process_detections(self, image_path, components, detect_plot=None, render=RENDER_EAGER,
+                           image_hash=None, timer=None, image=None, base_image=None, ocr_data=None):
+        # Without a timer from the caller, this call is timed on its own.
+        own_timer = timer is None
+        if own_timer:
+            timer = self.new_timer()
+            timer.start_profile()
+
+        # A failure in any stage must not leave this call's profiler or
+        # tracemalloc running into the next job.
+        finished = False
+        try:
+            img = image
+            if img is None:
+                img = self.decode(image_path, timer=timer)
+                base_image = self.overlay_base(image_path, render)
+
+            # With a base_image the decoded buffer may be masked in place;
+            # otherwise it stays untouched and the overlays draw on it.
+            in_place = base_image is not None
+            if base_image is None:
+                base_image = lambda: img
+
+            if ocr_data is None:
+                formatted_ocr = self.run_ocr(img, components, image_hash=image_hash, timer=timer, in_place=in_place)
+            else:
+                formatted_ocr = ocr_data
+
+            with timer.span('ocr_overlay'):
+                if detect_plot is None and render != RENDER_NONE:
+                    detect_plot = make_overlay(render, lambda: draw_detections(base_image(), components))
+                ocr_vis_img = make_overlay(render, lambda: draw_ocr(base_image(), formatted_ocr))
+
+            with timer.span('process_nodes'):
+                vis, final, netlist = self.processor.process_nodes(img, components, text_data=formatted_ocr,
+                                                                   render=render, timer=timer,
+                                                                   normalize_resolution=self.normalize_resolution,
+                                                                   base_image=base_image)
+
+            result = {
+                'image_path': image_path,
+                'components': components,
+                'ocr_data': formatted_ocr,
+                'netlist': netlist,
+                'detect_plot': detect_plot,
+                'ocr_vis': ocr_vis_img,
+                'clean': vis,
+                'schematic': final,
+            }
+
+            if own_timer:
+                self.finish_timer(result, timer)
+            finished = True
+        finally:
+            if own_timer and not finished:
+                timer.close()
+        return result
@@ -0,0 +1,96 @@
+import os
+import json
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def hash_file(path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def hash_array(arr):
+    h = hashlib.sha1()
+    h.update(f"{arr.shape}|{arr.dtype}".encode())
+    h.update(np.ascontiguousarray(arr).data)
+    return h.hexdigest()
+
+
+def hash_image(source):
+    if isinstance(source, np.ndarray):
+        return hash_array(source)
+    return hash_file(source)
+
+
+def _to_builtin(obj):
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Cannot cache object of type {type(obj).__name__}")
+
+
+class InferenceCache:
+    # Content-addressed store for detection/OCR outputs: an in-memory LRU in
+    # front of an optional SQLite file shared by every process using cache_dir.
+    def __init__(self, cache_dir=None, max_entries=256):
+        self.max_entries = max_entries
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.db = None
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            db_path = os.path.join(cache_dir, 'inference_cache.sqlite')
+            self.db = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, payload BLOB)")
+            self.db.commit()
+
+    def make_key(self, *parts):
+        return hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()
+
+    def _remember(self, key, payload):
+        self.memory[key] = payload
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def get(self, key):
+        # Values are decoded on every hit so callers can mutate them freely.
+        with self.lock:
+            payload = self.memory.get(key)
+            if payload is not None:
+                self.memory.move_to_end(key)
+            elif self.db is not None:
+                row = self.db.execute("SELECT payload FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    payload = row[0]
+                    self._remember(key, payload)
+
+        if payload is None:
+            return None
+        return json.loads(payload)
+
+    def put(self, key, value):
+        payload = json.dumps(value, default=_to_builtin, separators=(',', ':'))
+        with self.lock:
+            self._remember(key, payload)
+            if self.db is not None:
+                self.db.execute("INSERT OR REPLACE INTO entries (key, payload) VALUES (?, ?)", (key, payload))
+                self.db.commit()
+
+    def close(self):
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
@@ -0,0 +1,309 @@
+import base64
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import cv2
+import numpy as np
+
+from open_cv.overlays import RENDER_LAZY, RENDER_NONE, resolve_overlay
+
+OVERLAY_NAMES = ('detect_plot', 'ocr_vis', 'clean', 'schematic')
+# Analysis stops this long before the request deadline, so the partial
+# result still reaches the client instead of a 504.
+RESPONSE_MARGIN_S = 0.25
+
+
+class ServiceBusy(Exception):
+    pass
+
+
+class InferenceJob:
+    def __init__(self, image, overlays=(), analyze=False, timeout_s=None):
+        self.image = image
+        self.overlays = tuple(overlays)
+        self.analyze = analyze
+        self.future = Future()
+        self.queued_at = time.perf_counter()
+        self.deadline = None if timeout_s is None else self.queued_at + timeout_s
+        self.analysis = None
+
+
+def encode_png(image):
+    ok, buf = cv2.imencode('.png', image)
+    if not ok:
+        return None
+    return base64.b64encode(buf.tobytes()).decode('ascii')
+
+
+class InferenceService:
+    # Keeps `workers` warm pipelines (one model copy each) behind a bounded
+    # request queue. A batching thread groups requests that arrive within
+    # max_wait_ms into one detect_batch call, up to max_batch images.
+    def __init__(self, pipeline_factory, workers=1, queue_size=32, max_batch=8, max_wait_ms=20, timeout_s=60.0,
+                 analysis_timeout_s=30.0):
+        self.pipeline_factory = pipeline_factory
+        self.workers = max(1, workers)
+        self.max_batch = max(1, max_batch)
+        self.max_wait_s = max_wait_ms / 1000.0
+        self.timeout_s = timeout_s
+        self.analysis_timeout_s = analysis_timeout_s
+        self.analysis_pool = None
+        self.requests = queue.Queue(maxsize=queue_size)
+        # One batch waiting per worker: when all are busy the batcher blocks
+        # and new requests pile up in (and are refused by) the request queue.
+        self.batches = queue.Queue(maxsize=self.workers)
+        self.pipelines = []
+        self.ready = False
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def start(self, warm_up=True):
+        for _ in range(self.workers):
+            pipeline = self.pipeline_factory()
+            if warm_up:
+                for stage, error in pipeline.warm_up().items():
+                    if error is not None:
+                        raise RuntimeError(f"Could not load the {stage} model: {error}")
+            self.pipelines.append(pipeline)
+
+        # ?analyze=1 netlists are solved in separate processes so one that
+        # Lcapy cannot finish does not hold a model worker.
+        from Lcapy.analysis_pool import AnalysisPool
+        self.analysis_pool = AnalysisPool(workers=self.workers, timeout_s=self.analysis_timeout_s).start()
+
+        self._threads.append(threading.Thread(target=self._batch_loop, name='batcher', daemon=True))
+        for i, pipeline in enumerate(self.pipelines):
+            self._threads.append(threading.Thread(target=self._worker_loop, args=(pipeline,),
+                                                  name=f'worker-{i}', daemon=True))
+        for thread in self._threads:
+            thread.start()
+        self.ready = True
+
+    def stop(self):
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        for pipeline in self.pipelines:
+            pipeline.close()
+        if self.analysis_pool is not None:
+            self.analysis_pool.close()
+            self.analysis_pool = None
+        self.ready = False
+
+    def submit(self, image, overlays=(), analyze=False, timeout_s=None):
+        job = InferenceJob(image, overlays=overlays, analyze=analyze, timeout_s=timeout_s)
+        try:
+            self.requests.put_nowait(job)
+        except queue.Full:
+            raise ServiceBusy(f"Request queue is full ({self.requests.maxsize} waiting)")
+        return job
+
+    def run(self, image, overlays=(), analyze=False, timeout_s=None):
+        # Blocking helper: raises ServiceBusy, TimeoutError, or the pipeline error.
+        timeout_s = timeout_s or self.timeout_s
+        job = self.submit(image, overlays=overlays, analyze=analyze, timeout_s=timeout_s)
+        try:
+            return job.future.result(timeout=timeout_s)
+        except FutureTimeout:
+            # A job still in the queue is dropped; one already running finishes unseen.
+            job.future.cancel()
+            if job.analysis is not None:
+                self.analysis_pool.cancel(job.analysis)
+            raise TimeoutError(f"No result within {timeout_s:g}s")
+
+    def _batch_loop(self):
+        while not self._stopping.is_set():
+            try:
+                job = self.requests.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            batch = [job]
+            deadline = time.perf_counter() + self.max_wait_s
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            while not self._stopping.is_set():
+                try:
+                    self.batches.put(batch, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+        for _ in self.pipelines:
+            self.batches.put(None)
+
+    def _worker_loop(self, pipeline):
+        while True:
+            batch = self.batches.get()
+            if batch is None:
+                break
+            self.run_batch(pipeline, batch)
+
+    def run_batch(self, pipeline, batch):
+        # Jobs whose client already gave up were cancelled while queued.
+        jobs = [job for job in batch if job.future.set_running_or_notify_cancel()]
+        if not jobs:
+            return
+
+        start = time.perf_counter()
+        images = [job.image for job in jobs]
+        try:
+            detections = [components for components, _ in
+                          pipeline.detect_batch([None] * len(jobs), batch_size=len(jobs), images=images)]
+        except Exception:
+            # One bad image should not fail the others: detect one by one.
+            detections = []
+            for job in jobs:
+                try:
+                    _, components, _ = pipeline.detect(None, render=RENDER_NONE, image=job.image)
+                    detections.append(components)
+                except Exception as e:
+                    detections.append(e)
+        detect_s = round((time.perf_counter() - start) / len(jobs), 4)
+
+        for job, components in zip(jobs, detections):
+            try:
+                if isinstance(components, Exception):
+                    raise components
+                response = self.run_job(pipeline, job, components, detect_s, len(jobs), start)
+            except Exception as e:
+                job.future.set_exception(e)
+                continue
+            if job.analyze:
+                # The model worker moves on; the pool completes the response.
+                self.start_analysis(job, response)
+            else:
+                job.future.set_result(response)
+
+    def start_analysis(self, job, response):
+        def finish(analysis):
+            response['analysis'] = analysis.to_dict()
+            job.future.set_result(response)
+
+        deadline = None if job.deadline is None else job.deadline - RESPONSE_MARGIN_S
+        job.analysis = self.analysis_pool.submit(response['netlist'], on_done=finish, deadline=deadline)
+
+    def run_job(self, pipeline, job, components, detect_s, batch_size, batch_start):
+        render = RENDER_LAZY if job.overlays else RENDER_NONE
+        result = pipeline.process_detections(None, components, render=render, image=job.image)
+
+        response = {
+            'netlist': result['netlist'],
+            'components': [{'name': c['name'], 'box': [int(v) for v in c['box']],
+                            'conf': None if c.get('conf') is None else float(c['conf'])} for c in components],
+            'texts': result['ocr_data'],
+            'batch_size': batch_size,
+            'queue_s': round(batch_start - job.queued_at, 4),
+            'detect_s': detect_s,
+            'stages_s': {s['name']: round(s['wall_s'], 4) for s in result['timings']['stages']},
+        }
+
+        if job.overlays:
+            # Lazy overlays: only the requested ones are drawn.
+            response['overlays'] = {}
+            for name in job.overlays:
+                overlay = resolve_overlay(result[name])
+                response['overlays'][name] = encode_png(overlay) if overlay is not None else None
+        return response
+
+
+def parse_overlays(values):
+    names = [name for value in values for name in value.split(',') if name]
+    if 'all' in names:
+        return OVERLAY_NAMES
+    unknown = [name for name in names if name not in OVERLAY_NAMES]
+    if unknown:
+        raise ValueError(f"Unknown overlay {unknown[0]!r} (expected one of {', '.join(OVERLAY_NAMES)} or all)")
+    return tuple(dict.fromkeys(names))
+
+
+class InferenceHandler(BaseHTTPRequestHandler):
+    # POST /netlist with the raw image bytes as the body. Query options:
+    # overlays=schematic,ocr_vis|all, analyze=1, timeout=<seconds>.
+    # GET /health reports readiness and queue depth.
+    server_version = 'CircuitVision'
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        service = self.server.service
+        if urlparse(self.path).path != '/health':
+            self.send_json(404, {'error': f"Unknown path: {self.path}"})
+            return
+        self.send_json(200, {
+            'status': 'ok' if service.ready else 'warming',
+            'workers': service.workers,
+            'queued': service.requests.qsize(),
+            'queue_size': service.requests.maxsize,
+            'max_batch': service.max_batch,
+        })
+
+    def do_POST(self):
+        service = self.server.service
+        url = urlparse(self.path)
+        if url.path != '/netlist':
+            self.send_json(404, {'error': f"Unknown path: {self.path}"})
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0:
+            self.send_json(400, {'error': "Send the image bytes as the request body"})
+            return
+        if length > self.server.max_body_bytes:
+            self.send_json(413, {'error': f"Image larger than {self.server.max_body_bytes} bytes"})
+            return
+        body = self.rfile.read(length)
+
+        query = parse_qs(url.query)
+        try:
+            overlays = parse_overlays(query.get('overlays', []))
+            analyze = query.get('analyze', ['0'])[0].lower() in ('1', 'true', 'yes')
+            timeout_s = min(float(query.get('timeout', [service.timeout_s])[0]), service.timeout_s)
+        except ValueError as e:
+            self.send_json(400, {'error': str(e)})
+            return
+
+        image = cv2.imdecode(np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            self.send_json(400, {'error': "Could not decode the image"})
+            return
+
+        try:
+            response = service.run(image, overlays=overlays, analyze=analyze, timeout_s=timeout_s)
+        except ServiceBusy as e:
+            self.send_json(503, {'error': str(e)}, headers={'Retry-After': '1'})
+        except TimeoutError as e:
+            self.send_json(504, {'error': str(e)})
+        except Exception as e:
+            self.send_json(500, {'error': str(e)})
+        else:
+            self.send_json(200, response)
+
+
+def make_server(service, port=8765, host='127.0.0.1', max_body_bytes=32 << 20):
+    server = ThreadingHTTPServer((host, port), InferenceHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.max_body_bytes = max_body_bytes
+    return server
@@ -0,0 +1,225 @@
+import cv2
+import numpy as np
+
+from open_cv.overlays import RENDER_NONE
+from profiling.stage_timer import StageTimer
+
+
+def frame_source(source, stride=1):
+    # Yields (frame_index, BGR frame) from a camera index or a video file,
+    # keeping every stride-th frame.
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video source: {source}")
+    try:
+        index = 0
+        while True:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            if index % stride == 0:
+                yield index, frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def dhash(gray):
+    # 64-bit difference hash: is each pixel of a 9x8 thumbnail brighter than its left neighbour.
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+class FrameGate:
+    # Decides whether a frame differs enough from the last processed one to
+    # be worth re-running the models. A difference hash catches layout
+    # changes; a mean difference on a thumbnail catches small edits.
+    def __init__(self, max_hamming=2, diff_threshold=4.0, thumb_size=(64, 48)):
+        self.max_hamming = max_hamming
+        self.diff_threshold = diff_threshold
+        self.thumb_size = thumb_size
+        self._hash = None
+        self._thumb = None
+
+    def changed(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        thumb = cv2.resize(gray, self.thumb_size, interpolation=cv2.INTER_AREA).astype(np.int16)
+        frame_hash = dhash(gray)
+
+        if self._hash is not None:
+            hamming = bin(frame_hash ^ self._hash).count('1')
+            diff = float(np.abs(thumb - self._thumb).mean())
+            if hamming <= self.max_hamming and diff <= self.diff_threshold:
+                return False
+
+        # Compare against the last accepted frame so slow drift still adds up.
+        self._hash = frame_hash
+        self._thumb = thumb
+        return True
+
+
+def box_ious(boxes_a, boxes_b):
+    a = np.asarray(boxes_a, dtype=float).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=float).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def component_label(comp):
+    # 'resistor_3' -> 'resistor'; detection counters change between frames.
+    return comp.get('name', '').rsplit('_', 1)[0]
+
+
+class ComponentTracker:
+    # Matches detections to the previous frame's tracks by IoU (same class
+    # only). Each track keeps the OCR texts read around it, so texts are only
+    # re-read for components that are new or have moved.
+    def __init__(self, match_iou=0.3, moved_iou=0.85):
+        self.match_iou = match_iou
+        self.moved_iou = moved_iou
+        self.tracks = []
+        self._next_id = 0
+
+    def update(self, components):
+        # Returns the track for each component and the indices of components
+        # that are new, moved, or still waiting for a successful OCR read.
+        matches = {}
+        if self.tracks and components:
+            ious = box_ious([c['box'] for c in components], [t['box'] for t in self.tracks])
+            labels = [component_label(c) for c in components]
+            same = np.array([[label == t['label'] for t in self.tracks] for label in labels])
+            ious = np.where(same, ious, 0.0)
+
+            pairs = np.argwhere(ious >= self.match_iou)
+            pairs = pairs[np.argsort(-ious[pairs[:, 0], pairs[:, 1]], kind='stable')]
+            used = set()
+            for ci, ti in pairs:
+                if ci in matches or ti in used:
+                    continue
+                matches[ci] = (ti, ious[ci, ti])
+                used.add(ti)
+
+        tracks = []
+        stale = []
+        for i, comp in enumerate(components):
+            if i in matches:
+                ti, iou = matches[i]
+                track = self.tracks[ti]
+                if iou < self.moved_iou:
+                    track['texts'] = []
+                    track['read'] = False
+            else:
+                track = {'id': self._next_id, 'texts': [], 'read': False}
+                self._next_id += 1
+            if not track['read']:
+                stale.append(i)
+            track['label'] = component_label(comp)
+            track['box'] = tuple(int(v) for v in comp['box'])
+            tracks.append(track)
+
+        self.tracks = tracks
+        return tracks, stale
+
+
+def assign_texts(texts, components):
+    # Gives each text to the nearest component.
+    if not texts or not components:
+        return [[] for _ in components]
+    boxes = np.asarray([c['box'] for c in components], dtype=float)
+    comp_centers = np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2], axis=1)
+    text_centers = np.array([[(t['box'][0] + t['box'][2]) / 2, (t['box'][1] + t['box'][3]) / 2] for t in texts])
+    nearest = np.linalg.norm(text_centers[:, None, :] - comp_centers[None, :, :], axis=2).argmin(axis=1)
+
+    assigned = [[] for _ in components]
+    for text, i in zip(texts, nearest):
+        assigned[i].append(text)
+    return assigned
+
+
+class StreamProcessor:
+    # Turns a stream of frames into netlists, doing as little as possible
+    # per frame: unchanged frames are skipped, and OCR only reads around
+    # components that are new or have moved.
+    def __init__(self, pipeline, gate=None, tracker=None, render=RENDER_NONE):
+        self.pipeline = pipeline
+        self.gate = gate or FrameGate()
+        self.tracker = tracker or ComponentTracker()
+        self.render = render
+        self.last_result = None
+
+    def read_texts(self, frame, components, stale, timer):
+        # Returns (texts, error); texts are None when OCR failed.
+        if not stale:
+            return [], None
+        with timer.span('ocr_mask'):
+            masked = frame.copy()
+            for comp in components:
+                x1, y1, x2, y2 = map(int, comp['box'])
+                cv2.rectangle(masked, (x1, y1), (x2, y2), (255, 255, 255), -1)
+        with timer.span('ocr'):
+            try:
+                raw = self.pipeline.load_ocr().ocr_regions(masked, [components[i] for i in stale])
+            except Exception as e:
+                return None, str(e)
+        return self.pipeline.format_ocr_result(raw), None
+
+    def process_frame(self, frame_index, frame):
+        timer = StageTimer()
+        with timer.span('gate'):
+            changed = self.gate.changed(frame)
+        if not changed and self.last_result is not None:
+            timer.close()
+            return dict(self.last_result, frame_index=frame_index, skipped=True, timings=timer.to_dict())
+
+        with timer.span('detect'):
+            _, components = self.pipeline.load_detector().detect(frame, render=RENDER_NONE)
+
+        with timer.span('track'):
+            tracks, stale = self.tracker.update(components)
+
+        texts, ocr_error = self.read_texts(frame, components, stale, timer)
+        with timer.span('assign_texts'):
+            if texts is not None:
+                # The halo read around a stale component can cover labels of
+                # unchanged neighbours; those already have their texts cached,
+                # so only texts nearest to a stale component are kept.
+                assigned = assign_texts(texts, components)
+                for i in stale:
+                    tracks[i]['texts'] = assigned[i]
+                    tracks[i]['read'] = True
+            # process_nodes rewrites text entries, so it gets copies.
+            ocr_data = [dict(t) for track in tracks for t in track['texts']]
+
+        with timer.span('process_nodes'):
+            _, schematic, netlist = self.pipeline.processor.process_nodes(
+                frame, components, text_data=ocr_data, render=self.render, timer=timer,
+                normalize_resolution=self.pipeline.normalize_resolution)
+
+        timer.close()
+        result = {
+            'frame_index': frame_index,
+            'components': components,
+            'ocr_data': ocr_data,
+            'netlist': netlist,
+            'schematic': schematic,
+            'skipped': False,
+            'reread': len(stale),
+            'ocr_error': ocr_error,
+            'timings': timer.to_dict(),
+        }
+        # After an OCR failure the next frame is processed even if unchanged,
+        # so the stale components are read again.
+        self.last_result = result if ocr_error is None else None
+        return result
+
+    def run(self, frames):
+        # frames: iterable of (frame_index, frame), e.g. frame_source().
+        for frame_index, frame in frames:
+            yield self.process_frame(frame_index, frame)
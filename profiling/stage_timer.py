@@ -0,0 +1,159 @@
+import io
+import json
+import time
+import pstats
+import cProfile
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def peak_rss_kb():
+    # Process high-water mark (kB on Linux, bytes on macOS); None on Windows.
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class StageTimer:
+    # Collects wall/CPU time (and optionally traced peak memory) for nested
+    # named stages. Stage names are '/'-joined paths, e.g. 'process_nodes/dilate'.
+    def __init__(self, track_memory=False, profiler=None):
+        self.stages = []
+        self.track_memory = track_memory
+        self.profiler_name = profiler
+        self._profiler = None
+        self._stack = []
+        self._started_tracing = False
+
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    @contextmanager
+    def span(self, name):
+        path = "/".join([frame['name'] for frame in self._stack] + [name])
+        frame = {'name': name, 'child_peak': 0}
+        if self.track_memory:
+            tracemalloc.reset_peak()
+            frame['base'] = tracemalloc.get_traced_memory()[0]
+        self._stack.append(frame)
+
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield
+        finally:
+            stage = {
+                'name': path,
+                'wall_s': time.perf_counter() - start_wall,
+                'cpu_s': time.process_time() - start_cpu,
+            }
+            self._stack.pop()
+
+            if self.track_memory:
+                # reset_peak() in a nested span hides earlier peaks, so children
+                # report theirs upwards.
+                peak_abs = max(tracemalloc.get_traced_memory()[1], frame['child_peak'])
+                stage['peak_bytes'] = max(0, peak_abs - frame['base'])
+                if self._stack:
+                    self._stack[-1]['child_peak'] = max(self._stack[-1]['child_peak'], peak_abs)
+
+            rss = peak_rss_kb()
+            if rss is not None:
+                stage['peak_rss_kb'] = rss
+            self.stages.append(stage)
+
+    def start_profile(self):
+        if self.profiler_name == 'cprofile':
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.profiler_name == 'pyinstrument':
+            from pyinstrument import Profiler
+            self._profiler = Profiler()
+            self._profiler.start()
+        elif self.profiler_name:
+            raise ValueError(f"Unknown profiler: {self.profiler_name}")
+
+    def stop_profile(self):
+        if self._profiler is None:
+            return
+        if self.profiler_name == 'cprofile':
+            self._profiler.disable()
+        else:
+            self._profiler.stop()
+
+    @contextmanager
+    def profile(self):
+        self.start_profile()
+        try:
+            yield
+        finally:
+            self.stop_profile()
+
+    def profile_text(self, limit=30):
+        if self._profiler is None:
+            return ""
+        if self.profiler_name == 'cprofile':
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats('cumulative').print_stats(limit)
+            return out.getvalue()
+        return self._profiler.output_text()
+
+    def dump_profile(self, path):
+        if self._profiler is None:
+            return
+        if self.profiler_name == 'cprofile':
+            self._profiler.dump_stats(path)
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self._profiler.output_html())
+
+    def adopt(self, other, prefix):
+        # Takes stages timed on another thread. They are nested under prefix
+        # so totals() does not count time that overlapped this timer's spans.
+        for s in other.stages:
+            self.stages.append(dict(s, name=f"{prefix}/{s['name']}"))
+
+    def totals(self):
+        # Top-level stages only, so nested spans are not double counted.
+        return {s['name']: s['wall_s'] for s in self.stages if '/' not in s['name']}
+
+    def to_dict(self):
+        return {
+            'total_wall_s': sum(self.totals().values()),
+            'stages': list(self.stages),
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def dump_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def close(self):
+        self.stop_profile()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def summary(self):
+        lines = []
+        for s in self.stages:
+            line = f"{s['name']:<40} {s['wall_s'] * 1000:9.1f} ms wall {s['cpu_s'] * 1000:9.1f} ms cpu"
+            if 'peak_bytes' in s:
+                line += f" {s['peak_bytes'] / 1e6:8.1f} MB peak"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+def span(timer, name):
+    # Lets instrumented code accept timer=None without branching.
+    if timer is None:
+        return nullcontext()
+    return timer.span(name)
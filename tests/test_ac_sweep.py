@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+from Lcapy.ac_sweep import ac_sweep
+
+
+def test_rc_lowpass_corner():
+    fc = 1 / (2 * np.pi * 1e3 * 1e-6)
+    r = ac_sweep("V1 1 0 5\nR1 1 2 1k\nC1 2 0 1u", frequencies=[fc], cache=None)
+    assert r['input'] == 'V1'
+    assert r['magnitude_db']['2'][0] == pytest.approx(-3.0103, abs=1e-3)
+    assert r['phase_deg']['2'][0] == pytest.approx(-45.0, abs=1e-6)
+
+
+def test_series_rlc_matches_closed_form():
+    R, L, C = 10.0, 1e-3, 1e-6
+    f = np.geomspace(10, 1e6, 200)
+    r = ac_sweep(f"V1 1 0 1\nR1 1 2 {R}\nL1 2 3 {L}\nC1 3 0 {C}", frequencies=f, cache=None)
+    s = 2j * np.pi * f
+    expected = 1 / (s**2 * L * C + s * R * C + 1)
+    assert np.allclose(r['response']['3'], expected, rtol=1e-9)
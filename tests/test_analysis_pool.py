@@ -0,0 +1,66 @@
+import pytest
+
+from Lcapy.analysis_pool import AnalysisPool, DONE, FAILED, TIMEOUT, CANCELLED
+
+DIVIDER = "V1 1 0 5\nR1 1 2 1k\nR2 2 0 2k"
+# Three RC stages with a step source: Lcapy needs far longer than the
+# timeouts below, and reports the first nodes well before the last.
+LADDER = "V1 1 0 step 5\nR1 1 2 1k\nC1 2 0 1u\nR2 2 3 1k\nC2 3 0 1u\nR3 3 4 1k\nC3 4 0 1u"
+
+
+@pytest.fixture(scope='module')
+def pool():
+    with AnalysisPool(workers=1, timeout_s=30) as pool:
+        assert pool.wait_ready(120) is None
+        yield pool
+
+
+def test_job_matches_direct_analysis(pool):
+    from Lcapy.circuit_analysis import analyze_netlist
+
+    job = pool.analyze(DIVIDER)
+    assert job.status == DONE
+    assert job.pending_nodes == []
+    assert job.to_log() == analyze_netlist(DIVIDER)
+
+
+def test_timeout_returns_partial_result_and_recycles_worker(pool):
+    recycled = pool.recycled
+    partial = []
+    job = pool.submit(LADDER, timeout_s=8, on_partial=partial.append)
+    assert job.wait(60)
+
+    assert job.status == TIMEOUT
+    assert 'timed out' in job.error
+    assert job.finished_nodes
+    assert job.finished_nodes == [q.name for q in partial if q.kind == 'voltage']
+    assert sorted(job.finished_nodes + job.pending_nodes) == ['1', '2', '3', '4']
+    assert pool.recycled == recycled + 1
+
+    # The replacement worker takes the next job.
+    assert pool.wait_ready(120) is None
+    assert pool.analyze(DIVIDER).status == DONE
+
+
+def test_cancel_running_job(pool):
+    recycled = pool.recycled
+    job = pool.submit(LADDER)
+    job.wait(1.0)
+    pool.cancel(job)
+    assert job.wait(30)
+    assert job.status == CANCELLED
+    assert pool.recycled == recycled + 1
+
+
+def test_worker_without_lcapy_fails_jobs(tmp_path, monkeypatch):
+    # Spawned workers inherit sys.path, so this lcapy shadows the real one.
+    (tmp_path / 'lcapy').mkdir()
+    (tmp_path / 'lcapy' / '__init__.py').write_text("raise ImportError('no lcapy here')\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    with AnalysisPool(workers=2) as broken:
+        assert 'no lcapy here' in broken.wait_ready(120)
+        job = broken.analyze(DIVIDER)
+        assert job.status == FAILED
+        assert 'no lcapy here' in job.error
+        assert broken.recycled == 0
@@ -0,0 +1,39 @@
+import sympy as sp
+
+from Lcapy.expr_cleanup import ExprCleaner, select_branch
+
+t = sp.Symbol('t', real=True)
+R, C = sp.symbols('R C', positive=True)
+
+
+def test_conjugate_poles_become_real():
+    expr = sp.exp((-1 + 2 * sp.I) * t) / 2 + sp.exp((-1 - 2 * sp.I) * t) / 2
+    cleaned = ExprCleaner().clean(expr)
+    assert not cleaned.has(sp.I)
+    assert sp.simplify(cleaned - sp.exp(-t) * sp.cos(2 * t)) == 0
+
+
+def test_rational_functions_are_cancelled():
+    expr = (R**2 * C + R) / (R * C + 1)
+    assert ExprCleaner().clean(expr) == R
+
+
+def test_piecewise_keeps_positive_time_branch():
+    expr = sp.Piecewise((1 - sp.exp(-t), t >= 0), (0, True))
+    assert select_branch(expr) == 1 - sp.exp(-t)
+    assert ExprCleaner().clean(expr) == 1 - sp.exp(-t)
+
+
+def test_finished_results_are_cached():
+    cleaner = ExprCleaner()
+    expr = (R**2 * C + R) / (R * C + 1)
+    first = cleaner.clean(expr)
+    assert cleaner.results[expr] is first
+    assert cleaner.clean(expr) is first
+
+
+def test_results_cut_short_are_not_cached():
+    cleaner = ExprCleaner(budget_s=-1)
+    expr = (R**2 * C + R) / (R * C + 1)
+    assert cleaner.clean(expr) == expr
+    assert expr not in cleaner.results
@@ -0,0 +1,68 @@
+import numpy as np
+
+from pipeline.circuit_pipeline import CircuitPipeline
+from pipeline.inference_cache import InferenceCache, hash_image
+
+
+def test_hit_miss_cycle(tmp_path):
+    cache = InferenceCache(str(tmp_path))
+    key = cache.make_key('detect', 'abc', 'weights')
+    assert cache.get(key) is None
+
+    value = {'boxes': np.array([[1, 2, 3, 4]]), 'conf': np.float32(0.5), 'n': np.int64(1)}
+    cache.put(key, value)
+    hit = cache.get(key)
+    assert hit == {'boxes': [[1, 2, 3, 4]], 'conf': 0.5, 'n': 1}
+
+    # Hits are decoded copies.
+    hit['boxes'].append([5, 6, 7, 8])
+    assert cache.get(key)['boxes'] == [[1, 2, 3, 4]]
+    cache.close()
+
+    # A second process sharing cache_dir reads the entry from SQLite.
+    reopened = InferenceCache(str(tmp_path))
+    assert reopened.get(key) == {'boxes': [[1, 2, 3, 4]], 'conf': 0.5, 'n': 1}
+    reopened.close()
+
+
+def test_memory_lru_eviction():
+    cache = InferenceCache(max_entries=2)
+    for k in ('a', 'b'):
+        cache.put(k, k)
+    cache.get('a')
+    cache.put('c', 'c')
+    assert cache.get('b') is None
+    assert cache.get('a') == 'a'
+    assert cache.get('c') == 'c'
+
+
+def test_image_hash_follows_content(tmp_path):
+    img = np.zeros((8, 8, 3), dtype=np.uint8)
+    assert hash_image(img) == hash_image(img.copy())
+    edited = img.copy()
+    edited[0, 0, 0] = 1
+    assert hash_image(edited) != hash_image(img)
+    assert hash_image(img) != hash_image(img.reshape(8, 24))
+
+    path = tmp_path / 'page.png'
+    path.write_bytes(b'one')
+    first = hash_image(str(path))
+    path.write_bytes(b'two')
+    assert hash_image(str(path)) != first
+
+
+def test_keys_change_with_detector_and_language():
+    pipeline = CircuitPipeline('weights.pt', cache=InferenceCache(), load=False)
+    pipeline.detector_fingerprint = 'w1|conf=0.25|iou=0.45'
+    detect, ocr, full = pipeline.detection_key('img'), pipeline.ocr_key('img'), pipeline.full_ocr_key('img')
+
+    pipeline.detector_fingerprint = 'w1|conf=0.5|iou=0.45'
+    assert pipeline.detection_key('img') != detect
+    assert pipeline.ocr_key('img') != ocr
+    assert pipeline.full_ocr_key('img') == full
+
+    pipeline.lang = 'ch'
+    assert pipeline.full_ocr_key('img') != full
+    pipeline.ocr_regions = True
+    assert pipeline.ocr_key('img') != ocr
+    assert pipeline.detection_key('other') != pipeline.detection_key('img')
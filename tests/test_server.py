@@ -0,0 +1,94 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from pipeline.server import InferenceService, ServiceBusy, parse_overlays, OVERLAY_NAMES
+
+DIVIDER = "V1 1 0 5\nR1 1 2 1k\nR2 2 0 2k"
+LADDER = "V1 1 0 step 5\nR1 1 2 1k\nC1 2 0 1u\nR2 2 3 1k\nC2 3 0 1u\nR3 3 4 1k\nC3 4 0 1u"
+
+
+class FakePipeline:
+    # Stands in for CircuitPipeline: the image's first pixel picks the netlist.
+    def warm_up(self):
+        return {}
+
+    def detect_batch(self, sources, batch_size, images):
+        if any(image[0, 0] < 0 for image in images):
+            raise ValueError("bad image in batch")
+        return [([], None) for _ in images]
+
+    def detect(self, source, render=None, image=None):
+        if image[0, 0] < 0:
+            raise ValueError("bad image")
+        return None, [], None
+
+    def process_detections(self, source, components, render=None, image=None):
+        netlist = LADDER if image[0, 0] == 2 else DIVIDER
+        return {'netlist': netlist, 'ocr_data': [], 'timings': {'stages': [{'name': 'ocr', 'wall_s': 0.0}]}}
+
+    def close(self):
+        pass
+
+
+def image(value):
+    return np.full((2, 2), value, dtype=float)
+
+
+@pytest.fixture(scope='module')
+def service():
+    service = InferenceService(FakePipeline, workers=1, max_batch=4, max_wait_ms=200, timeout_s=30)
+    service.start(warm_up=False)
+    assert service.analysis_pool.wait_ready(120) is None
+    yield service
+    service.stop()
+
+
+def test_parse_overlays():
+    assert parse_overlays(['schematic,ocr_vis', 'schematic']) == ('schematic', 'ocr_vis')
+    assert parse_overlays(['all']) == OVERLAY_NAMES
+    with pytest.raises(ValueError):
+        parse_overlays(['heatmap'])
+
+
+def test_full_queue_is_refused():
+    service = InferenceService(FakePipeline, queue_size=1)
+    service.submit(image(0))
+    with pytest.raises(ServiceBusy):
+        service.submit(image(0))
+
+
+def test_requests_are_batched(service):
+    jobs = [service.submit(image(0)) for _ in range(3)]
+    responses = [job.future.result(10) for job in jobs]
+    assert all(r['netlist'] == DIVIDER for r in responses)
+    assert [r['batch_size'] for r in responses] == [3, 3, 3]
+
+
+def test_bad_image_fails_alone(service):
+    good, bad = service.submit(image(0)), service.submit(image(-1))
+    assert good.future.result(10)['netlist'] == DIVIDER
+    with pytest.raises(ValueError):
+        bad.future.result(10)
+
+
+def test_analysis_does_not_hold_the_model_worker(service):
+    analyzed = service.run(image(0), analyze=True)
+    assert analyzed['analysis']['status'] == 'done'
+
+    results = {}
+    thread = threading.Thread(target=lambda: results.update(slow=service.run(image(2), analyze=True, timeout_s=6)))
+    thread.start()
+    time.sleep(0.5)
+    start = time.perf_counter()
+    plain = service.run(image(0))
+    assert time.perf_counter() - start < 2
+    assert 'analysis' not in plain
+
+    thread.join(30)
+    # The deadline stops the analysis just before the request times out.
+    analysis = results['slow']['analysis']
+    assert analysis['status'] == 'timeout'
+    assert sorted(analysis['finished_nodes'] + analysis['pending_nodes']) == ['1', '2', '3', '4']
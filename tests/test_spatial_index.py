@@ -0,0 +1,46 @@
+import math
+
+import numpy as np
+import pytest
+
+from open_cv.spatial_index import GridIndex
+
+
+def brute_nearest(points, point, max_dist):
+    best, best_dist = None, float('inf')
+    for i, (px, py) in enumerate(points):
+        dist = math.sqrt((point[0] - px)**2 + (point[1] - py)**2)
+        if dist < best_dist:
+            best, best_dist = i, dist
+    if best is None or best_dist >= max_dist:
+        return None, float('inf')
+    return best, best_dist
+
+
+@pytest.mark.parametrize('cell_size', [7, 25, 100])
+def test_matches_brute_force(cell_size):
+    rng = np.random.default_rng(0)
+    # Integer coordinates, so there are exact ties and points on cell edges.
+    points = rng.integers(-200, 200, size=(300, 2))
+    queries = rng.integers(-250, 250, size=(200, 2))
+    index = GridIndex(points, cell_size)
+
+    for q in queries.tolist():
+        for radius in (5, 25, 60):
+            assert index.nearest(q, radius) == brute_nearest(points.tolist(), q, radius)
+            expected = [i for i, (px, py) in enumerate(points.tolist())
+                        if math.sqrt((q[0] - px)**2 + (q[1] - py)**2) < radius]
+            assert index.query_radius(q, radius) == expected
+
+
+def test_ties_go_to_lowest_index():
+    index = GridIndex([(10, 0), (-10, 0), (0, 10)], 20)
+    assert index.nearest((0, 0), 50) == (0, 10.0)
+    assert index.nearest((0, 0), 10) == (None, float('inf'))
+
+
+def test_empty_index():
+    index = GridIndex([], 20)
+    assert len(index) == 0
+    assert index.nearest((0, 0), 50) == (None, float('inf'))
+    assert index.query_radius((0, 0), 50) == []
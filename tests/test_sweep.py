@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from Lcapy.sweep import parametric_sweep, sweep_points
+
+
+def rlc_step(R, t):
+    # Capacitor voltage of a series RLC (L = C = 1) after a unit step.
+    a = R / 2
+    if a < 1:
+        w = np.sqrt(1 - a**2)
+        return 1 - np.exp(-a * t) * (np.cos(w * t) + a / w * np.sin(w * t))
+    if a == 1:
+        return 1 - np.exp(-t) * (1 + t)
+    k = np.sqrt(a**2 - 1)
+    s1, s2 = -a + k, -a - k
+    return 1 + (s2 * np.exp(s1 * t) - s1 * np.exp(s2 * t)) / (s1 - s2)
+
+
+def test_sweep_through_critical_damping():
+    resistances = [0.5, 1.0, 1.99, 2.0, 2.01, 3.0]
+    r = parametric_sweep("V1 1 0 {u(t)}\nR1 1 2 3\nL1 2 3 1\nC1 3 0 1", {'R1': resistances}, t=1.0, cache=None)
+    v = r['nodes']['3']
+    assert not np.iscomplexobj(v)
+    assert np.isfinite(v).all()
+    assert np.allclose(v, [rlc_step(R, 1.0) for R in resistances], rtol=1e-6)
+
+
+def test_dc_divider_sweep():
+    R1 = sweep_points(1e3, 1e5, 5)
+    r = parametric_sweep("V1 1 0 5\nR1 1 2 1k\nR2 2 0 2k", {'R1': R1}, cache=None)
+    assert np.allclose(r['nodes']['2'], 5 * 2e3 / (R1 + 2e3))
+
+
+def test_time_dependent_sweep_needs_t():
+    with pytest.raises(ValueError):
+        parametric_sweep("V1 1 0 {u(t)}\nR1 1 2 1k\nC1 2 0 1u", {'R1': [1e3]}, cache=None)
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from Lcapy.transient import TransientSystem, simulate_transient
+
+
+def lines_of(netlist_str):
+    return [line for line in netlist_str.split('\n') if line.strip()]
+
+
+def test_rc_step_matches_closed_form():
+    # tau = 1 ms
+    r = simulate_transient("V1 1 0 step 5\nR1 1 2 1k\nC1 2 0 1u", t_stop=5e-3, step=5e-6)
+    t = r['t']
+    expected = 5 * (1 - np.exp(-t / 1e-3))
+    assert np.abs(r['nodes']['2'] - expected).max() < 1e-3
+    assert np.abs(r['branches']['R1'] - 5e-3 * np.exp(-t / 1e-3))[1:].max() < 1e-5
+
+
+@pytest.mark.parametrize('source', ["{u(t)}", "step 1"])
+def test_underdamped_rlc_step_matches_closed_form(source):
+    r = simulate_transient(f"V1 1 0 {source}\nR1 1 2 1\nL1 2 3 1\nC1 3 0 1", t_stop=10, step=1e-2)
+    t = r['t']
+    w = np.sqrt(3) / 2
+    expected = 1 - np.exp(-t / 2) * (np.cos(w * t) + np.sin(w * t) / np.sqrt(3))
+    assert np.abs(r['nodes']['3'] - expected).max() < 1e-4
+
+
+def test_trapezoidal_is_second_order():
+    netlist = "V1 1 0 step 1\nR1 1 2 1\nL1 2 3 1\nC1 3 0 1"
+    w = np.sqrt(3) / 2
+    errors = []
+    for steps in (500, 1000):
+        r = simulate_transient(netlist, t_stop=10, step=10 / steps)
+        t = r['t']
+        expected = 1 - np.exp(-t / 2) * (np.cos(w * t) + np.sin(w * t) / np.sqrt(3))
+        errors.append(np.abs(r['nodes']['3'] - expected).max())
+    assert 3.5 < errors[0] / errors[1] < 4.5
+
+
+def test_dc_source_is_constant():
+    r = simulate_transient("V1 1 0 dc 5\nR1 1 2 1k\nR2 2 0 1k")
+    assert np.allclose(r['nodes']['2'], 2.5)
+
+
+def test_ac_source_is_rejected():
+    with pytest.raises(ValueError):
+        simulate_transient("V1 1 0 ac 1\nR1 1 2 1k\nC1 2 0 1u")
+
+
+def test_default_span_follows_slowest_pole():
+    # Poles near -R/L = -2e9 and -1/(R*C) = -0.25: the slow one sets the
+    # span, the fast one must not shrink it.
+    system = TransientSystem(lines_of("V1 1 0 step 1\nR1 1 2 4k\nL1 2 3 2u\nC1 3 0 1m"))
+    assert system.default_stop() == pytest.approx(5 * 4e3 * 1e-3, rel=1e-3)
+
+
+def test_default_span_covers_ringing():
+    # L=1, C=1 with R=0.01: decay time 200 s, ringing period 2*pi s.
+    system = TransientSystem(lines_of("V1 1 0 step 1\nR1 1 2 0.01\nL1 2 3 1\nC1 3 0 1"))
+    t_stop = system.default_stop()
+    assert t_stop == pytest.approx(5 * 200, rel=1e-3)
+    assert system.default_step(t_stop) == pytest.approx(2 * np.pi / 20, rel=1e-3)
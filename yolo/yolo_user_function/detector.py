@@ -1,23 +1,25 @@
 from ultralytics import YOLO
 import numpy as np
+import cv2
+
+from open_cv.overlays import RENDER_EAGER, make_overlay
 
 class YoloDetector:
-    def __init__(self, model_path):
+    def __init__(self, model_path, conf=0.4, iou=0.6):
         self.model = YOLO(model_path)
+        self.conf = conf
+        self.iou = iou
 
-    def detect(self, image_path):
-        results = self.model.predict(image_path, conf=0.4,iou=0.6, verbose=False)[0]
-        
-        detect_plot = results.plot()
-        
+    def parse_result(self, results):
         components = []
         class_counters = {}
         
         boxes = results.boxes.xyxy.cpu().numpy().astype(int)
         classes = results.boxes.cls.cpu().numpy().astype(int)
+        confs = results.boxes.conf.cpu().numpy()
         names = results.names
 
-        for box, cls in zip(boxes, classes):
+        for box, cls, conf in zip(boxes, classes, confs):
             x1, y1, x2, y2 = box
             label = names[cls]
             
@@ -28,7 +30,33 @@ class YoloDetector:
             components.append({
                 "name": f"{label}_{class_counters[label]}",
                 "box": (x1, y1, x2, y2),
+                "conf": float(conf),
                 "raw_nodes": [] 
             })
             
-        return detect_plot, components
\ No newline at end of file
+        return components
+
+    def detect(self, source, render=RENDER_EAGER, base_image=None):
+        # source: image path or BGR array. base_image, if given, returns the
+        # unmasked image to draw on when the source buffer is reused in place.
+        results = self.model.predict(source, conf=self.conf, iou=self.iou, verbose=False)[0]
+        
+        if base_image is None:
+            detect_plot = make_overlay(render, results.plot)
+        else:
+            detect_plot = make_overlay(render, lambda: results.plot(img=base_image()))
+        
+        return detect_plot, self.parse_result(results)
+
+    def detect_batch(self, sources, batch_size=8):
+        # sources: image paths and/or BGR arrays. Returns one component list per source.
+        sources = list(sources)
+        all_components = []
+        for start in range(0, len(sources), batch_size):
+            chunk = sources[start:start + batch_size]
+            if not all(isinstance(s, str) for s in chunk):
+                # Ultralytics cannot mix file and array sources in one call.
+                chunk = [cv2.imread(s) if isinstance(s, str) else s for s in chunk]
+            results = self.model.predict(chunk, conf=self.conf, iou=self.iou, batch=len(chunk), verbose=False)
+            all_components.extend(self.parse_result(r) for r in results)
+        return all_components
@@ -0,0 +1,166 @@
+import os
+import ast
+
+import numpy as np
+import cv2
+
+from open_cv.overlays import RENDER_EAGER, RENDER_NONE, make_overlay, draw_detections
+
+
+def export_onnx(model_path, imgsz=640, opset=None):
+    # One-off conversion of the Ultralytics weights; writes <model>.onnx next
+    # to the .pt file and returns its path.
+    from ultralytics import YOLO
+    kwargs = {'format': 'onnx', 'imgsz': imgsz, 'dynamic': False}
+    if opset:
+        kwargs['opset'] = opset
+    return YOLO(model_path).export(**kwargs)
+
+
+def letterbox(img, new_shape, color=(114, 114, 114)):
+    # Resize keeping the aspect ratio and pad to new_shape (h, w), as
+    # Ultralytics does. Returns the image, the scale and the (left, top) pad.
+    h, w = img.shape[:2]
+    ratio = min(new_shape[0] / h, new_shape[1] / w)
+    new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+    if (new_w, new_h) != (w, h):
+        img = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+    pad_w, pad_h = (new_shape[1] - new_w) / 2, (new_shape[0] - new_h) / 2
+    top, bottom = int(round(pad_h - 0.1)), int(round(pad_h + 0.1))
+    left, right = int(round(pad_w - 0.1)), int(round(pad_w + 0.1))
+    img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    return img, ratio, (left, top)
+
+
+def box_iou(box, boxes):
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2])
+    y2 = np.minimum(box[3], boxes[:, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return inter / np.maximum(area + areas - inter, 1e-9)
+
+
+def nms(boxes, scores, classes, iou_threshold, max_det=300):
+    # Class-aware NMS: boxes of different classes are shifted apart so one
+    # pass never lets them suppress each other. Returns kept indices, best first.
+    offset = classes.astype(np.float32)[:, None] * (boxes.max() + 1)
+    shifted = boxes + offset
+
+    order = np.argsort(-scores, kind='stable')
+    keep = []
+    while order.size and len(keep) < max_det:
+        best = order[0]
+        keep.append(best)
+        if order.size == 1:
+            break
+        ious = box_iou(shifted[best], shifted[order[1:]])
+        order = order[1:][ious <= iou_threshold]
+    return np.array(keep, dtype=int)
+
+
+class OnnxYoloDetector:
+    # Drop-in replacement for YoloDetector that runs an exported YOLOv8 ONNX
+    # model on onnxruntime's CPU provider.
+    def __init__(self, model_path, conf=0.4, iou=0.6, intra_op_threads=None, inter_op_threads=None,
+                 max_det=300):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        if inter_op_threads:
+            options.inter_op_num_threads = inter_op_threads
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        self.conf = conf
+        self.iou = iou
+        self.max_det = max_det
+
+        # Ultralytics stores the class names and input size in the metadata.
+        meta = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(meta['names']) if 'names' in meta else {}
+        if 'imgsz' in meta:
+            self.imgsz = tuple(ast.literal_eval(meta['imgsz']))
+        else:
+            shape = self.session.get_inputs()[0].shape
+            self.imgsz = (shape[2], shape[3])
+
+    def preprocess(self, img):
+        padded, ratio, pad = letterbox(img, self.imgsz)
+        blob = cv2.cvtColor(padded, cv2.COLOR_BGR2RGB).transpose(2, 0, 1)
+        blob = np.ascontiguousarray(blob, dtype=np.float32)[None] / 255.0
+        return blob, ratio, pad
+
+    def postprocess(self, output, ratio, pad, shape):
+        # output: (4 + num_classes, num_anchors) with boxes as cx, cy, w, h.
+        preds = output[0].T if output.ndim == 3 else output.T
+        class_scores = preds[:, 4:]
+        classes = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(preds)), classes]
+
+        mask = scores > self.conf
+        preds, classes, scores = preds[mask], classes[mask], scores[mask]
+        if not len(preds):
+            return np.zeros((0, 4), dtype=int), classes, scores
+
+        cx, cy, w, h = preds[:, 0], preds[:, 1], preds[:, 2], preds[:, 3]
+        boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+        keep = nms(boxes, scores, classes, self.iou, self.max_det)
+        boxes, classes, scores = boxes[keep], classes[keep], scores[keep]
+
+        boxes -= np.array([pad[0], pad[1], pad[0], pad[1]], dtype=boxes.dtype)
+        boxes /= ratio
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, shape[1])
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, shape[0])
+        return boxes.astype(int), classes, scores
+
+    def parse_result(self, boxes, classes, scores):
+        components = []
+        class_counters = {}
+
+        for box, cls, conf in zip(boxes, classes, scores):
+            x1, y1, x2, y2 = box
+            label = self.names.get(int(cls), str(int(cls)))
+
+            if label not in class_counters:
+                class_counters[label] = 0
+            class_counters[label] += 1
+
+            components.append({
+                "name": f"{label}_{class_counters[label]}",
+                "box": (x1, y1, x2, y2),
+                "conf": float(conf),
+                "raw_nodes": []
+            })
+
+        return components
+
+    def predict(self, img):
+        blob, ratio, pad = self.preprocess(img)
+        output = self.session.run(None, {self.input_name: blob})[0]
+        return self.parse_result(*self.postprocess(output, ratio, pad, img.shape[:2]))
+
+    def detect(self, source, render=RENDER_EAGER, base_image=None):
+        img = cv2.imread(source) if isinstance(source, (str, os.PathLike)) else source
+        if img is None:
+            raise ValueError(f"Could not read image: {source}")
+        components = self.predict(img)
+
+        if base_image is None:
+            detect_plot = make_overlay(render, lambda: draw_detections(img, components))
+        else:
+            detect_plot = make_overlay(render, lambda: draw_detections(base_image(), components))
+
+        return detect_plot, components
+
+    def detect_batch(self, sources, batch_size=8):
+        # The exported model has a fixed batch of 1, so images run one by one.
+        all_components = []
+        for source in sources:
+            _, components = self.detect(source, render=RENDER_NONE)
+            all_components.append(components)
+        return all_components